@@ -1,6 +1,10 @@
 import sys
 import os
 import errno
+import py_compile
+import shutil
+import tempfile
+import zipapp
 
 
 link = "/usr/local/bin/cpm"
@@ -19,11 +23,25 @@ def has_remove_arg(args):
     return False
 
 
+def has_zipapp_arg(args):
+    """
+    Checks if zipapp argument exists
+    :param args: Argument list
+    :return: True if zipapp argument is found, False otherwise
+    """
+
+    return "zipapp" in args
+
+
 def main(args):
     if has_remove_arg(args):
         remove()
         return
 
+    if has_zipapp_arg(args):
+        install_zipapp()
+        return
+
     install()
 
 
@@ -64,6 +82,53 @@ def create_symlink():
             raise error
 
 
+def build_zipapp(target):
+    """
+    Build a single-file zipapp with the scripts and the templates. The scripts are stored along with their bytecode
+    for the Python version running this script, so nothing has to be compiled when cpm starts. Any other Python
+    version (e.g. after python3 is upgraded) skips the bytecode and compiles the sources instead.
+    :param target: path of the zipapp
+    """
+    root = os.path.abspath(os.path.dirname(__file__))
+    with tempfile.TemporaryDirectory() as staging:
+        shutil.copytree(os.path.join(root, "scripts"), os.path.join(staging, "scripts"),
+                        ignore=shutil.ignore_patterns("__pycache__", "cpm"))
+        shutil.copytree(os.path.join(root, "templates"), os.path.join(staging, "templates"))
+        # The archive runs __main__.py, which is the cpm script itself
+        shutil.copyfile(os.path.join(root, "scripts", "cpm"), os.path.join(staging, "__main__.py"))
+
+        for directory, _, files in os.walk(staging):
+            for file in files:
+                if not file.endswith(".py"):
+                    continue
+                source = os.path.join(directory, file)
+                # Bytecode next to the source is preferred when importing from a zip file, if it was compiled
+                # by the same Python version. It is not checked against the source, which does not change
+                # inside the archive anyway.
+                py_compile.compile(source, cfile=source + "c", doraise=True,
+                                   invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+
+        zipapp.create_archive(staging, target, interpreter="/usr/bin/env python3")
+
+
+def install_zipapp():
+    """
+    Installs cpm as a zipapp, instead of a symbolic link to the script
+    """
+
+    print("Installing the zipapp...")
+    try:
+        if os.path.lexists(link):
+            os.remove(link)
+        build_zipapp(link)
+    except OSError as error:
+        if error.errno == errno.EACCES:
+            print_permission_denied()
+            return
+        raise error
+    print("Finished")
+
+
 def install():
     """
     Creates a symbolic link to the script
@@ -0,0 +1,96 @@
+"""
+Functions for using cpm from other Python programs. Unlike the command line options, they do not depend on
+the current working directory and do not print anything, the outcome is returned instead. They can be called
+any number of times in one process.
+"""
+import os
+from collections import namedtuple
+
+from scripts.module import NAME_REGEX, Module
+from scripts.sync import Sync
+from scripts.verbose import Verbose
+
+# name: name of the module
+# files: paths of the created files
+# error: error message if the module was not created, None otherwise
+CreatedModule = namedtuple('CreatedModule', ['name', 'files', 'error'])
+
+# old_name, new_name: names of the module
+# files: new paths of the renamed files
+# updated_files: paths (relative to src) of the files whose includes were updated
+# error: error message if the module was not renamed, None otherwise
+RenamedModule = namedtuple('RenamedModule', ['old_name', 'new_name', 'files', 'updated_files', 'error'])
+
+
+def invalid_name_error(name):
+    """
+    :param name: name of a module
+    :return: error message for a name that is not valid
+    """
+    return "The name {} is not valid. Only alphanumerical characters are accepted.".format(name)
+
+
+def create_modules(root, names, directory=False, jobs=1):
+    """
+    Create modules (source and header files) in the root directory. A module that cannot be created does not stop
+    the others. If the root directory is inside a project, the project is synced once all modules are created.
+    :param root: directory to create the modules in, e.g. the src directory of a project
+    :param names: names of the modules
+    :param directory: if True, each module is created inside its own directory
+    :param jobs: number of threads writing the files
+    :return: list of CreatedModule, in the same order as the names
+    """
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise NotADirectoryError("{} is not a directory".format(root))
+
+    existing = Module.existing_names([name for name in names if NAME_REGEX.match(name)], root)
+    errors = []
+    seen = set()
+    for name in names:
+        if not NAME_REGEX.match(name):
+            errors.append(invalid_name_error(name))
+        elif name in existing:
+            errors.append("Module with the name {0} already exists.".format(name))
+        elif name in seen:
+            errors.append("The name {0} is given more than once.".format(name))
+        else:
+            errors.append(None)
+        seen.add(name)
+
+    valid_names = [name for name, error in zip(names, errors) if error is None]
+    created = iter(Module.create_many_files(valid_names, directory, root, jobs))
+    if valid_names:
+        Sync.sync_if_in_project(Verbose(0), root)
+    return [CreatedModule(name, next(created) if error is None else [], error) for name, error in zip(names, errors)]
+
+
+def rename_module(root, old_name, new_name, jobs=1):
+    """
+    Rename the module in the root directory, and update the includes of the module in the whole src directory
+    (if the root directory is inside one). If the root directory is inside a project, the project is synced.
+    :param root: directory the module is in
+    :param old_name: current name of the module
+    :param new_name: new name of the module
+    :param jobs: number of processes used to update the includes
+    :return: RenamedModule
+    """
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise NotADirectoryError("{} is not a directory".format(root))
+
+    for name in (old_name, new_name):
+        if not NAME_REGEX.match(name):
+            return RenamedModule(old_name, new_name, [], [], invalid_name_error(name))
+
+    verbose = Verbose(0)
+    module = Module(verbose, old_name, jobs, directory=root)
+    error = module.rename_error(new_name)
+    if error is not None:
+        return RenamedModule(old_name, new_name, [], [], error)
+
+    files = module.rename_files(new_name)
+    updated_files = module.update_usages({old_name: new_name})
+    module.name = new_name
+    Sync.sync_if_in_project(verbose, root)
+    return RenamedModule(old_name, new_name, files, updated_files, None)
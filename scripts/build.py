@@ -0,0 +1,77 @@
+import argparse
+import os
+import subprocess
+import sys
+
+from scripts.generators import Generator, MakeGenerator
+from scripts.stats import CompileTimes, Stats
+from scripts.submanager import Submanager
+from scripts.sync import Sync
+from scripts.verbose import Verbose, MessageType
+
+
+class Build(Submanager):
+    """
+    Builds a project with the build system it was created for
+    """
+
+    def __init__(self, verbose_obj, project_dir):
+        """
+        :param verbose_obj: Verbose object
+        :param project_dir: project directory
+        """
+        super().__init__(verbose_obj)
+        self.project_dir = project_dir
+        self.generator = Generator.detect(project_dir)
+
+    @staticmethod
+    def add_subparser(subparsers):
+        """
+        Set up the build option and all its arguments
+        :param subparsers: subparsers of the argument parser
+        """
+        parser = subparsers.add_parser('build', help='builds the project (with make or ninja)')
+        parser.add_argument('--time-report', action='store_true',
+                            help='record the compile time and memory usage of every source file and print '
+                                 'the slowest ones, see cpm stats (make only)')
+        parser.add_argument('-v', '--verbose', action='count')
+        parser.add_argument('arguments', nargs=argparse.REMAINDER,
+                            help='arguments for the build system, e.g. -- -j8 PROFILE=release')
+        # Set a function that will be called to handle the arguments
+        parser.set_defaults(function=Build.handle_args)
+
+    @staticmethod
+    def handle_args(args, verbose):
+        """
+        Handle the program arguments
+        :param args: Program arguments
+        :param verbose: Verbose object
+        """
+        project_dir = Sync.find_project_dir(os.getcwd())
+        if project_dir is None:
+            Verbose.print_any_level(MessageType.ERROR, "no project found in the current directory or its parents")
+            sys.exit(2)
+
+        arguments = args.arguments[1:] if args.arguments[:1] == ['--'] else args.arguments
+        sys.exit(Build(verbose, project_dir).build(arguments, args.time_report))
+
+    def build(self, arguments, time_report=False):
+        """
+        Run the build system in the project directory
+        :param arguments: list of arguments for the build system
+        :param time_report: record the compile times and print the slowest units afterwards
+        :return: exit code of the build system
+        """
+        command = [self.generator.BUILD_TOOL] + arguments
+        if time_report:
+            if self.generator is not MakeGenerator:
+                Verbose.print_any_level(MessageType.ERROR, "the time report is only supported with make")
+                return 2
+            CompileTimes(self.project_dir).clear_records()
+            command.append("TIME_REPORT=1")
+
+        self.verbose.print(MessageType.INFO, " ".join(command))
+        returncode = subprocess.run(command, cwd=self.project_dir).returncode
+        if time_report and returncode == 0:
+            Stats(self.verbose, self.project_dir).print_report()
+        return returncode
@@ -0,0 +1,445 @@
+# hashlib, shutil, subprocess, tempfile and fcntl are imported by the methods using them, so the actions that do not
+# compile anything (e.g. cpm cache stats) start without them
+import argparse
+import json
+import os
+import re
+import sys
+from contextlib import contextmanager
+
+from scripts.submanager import Submanager
+from scripts.verbose import Verbose, MessageType
+
+
+def parse_size(value):
+    """
+    Argument type for sizes, given in bytes or with a K, M or G suffix (e.g. 500M)
+    :param value: size as str
+    :return: size in bytes
+    """
+    match = re.fullmatch(r'(\d+)([KMG]?)', value.strip().upper())
+    if match is None:
+        raise argparse.ArgumentTypeError("{} is not a valid size".format(value))
+    return int(match.group(1)) * 1024 ** " KMG".index(match.group(2) or " ")
+
+
+def format_size(size):
+    """
+    Format the size in bytes in a human readable form
+    :param size: size in bytes
+    :return: formatted size, e.g. 1.5 MiB
+    """
+    if size < 1024:
+        return "{} B".format(size)
+    for unit in ("KiB", "MiB", "GiB"):
+        size /= 1024
+        if size < 1024 or unit == "GiB":
+            return "{:.1f} {}".format(size, unit)
+
+
+class CompileCommand:
+    """
+    A compiler command line that compiles a single source file into an object, e.g. gcc -c foo.c -o foo.o
+    """
+    # Options writing the dependency file, and the ones among them that take a value
+    DEPENDENCY_OPTIONS = {'-MD', '-MMD', '-MP', '-MF', '-MT', '-MQ'}
+    DEPENDENCY_OPTIONS_WITH_VALUE = {'-MF', '-MT', '-MQ'}
+    # Options making the object depend on more than the preprocessed source: split debug information goes to
+    # a .dwo file next to the object (which is not stored in the cache), and the profile options read or name
+    # the profile data (.gcda files) of the last training run
+    UNCACHEABLE_PREFIXES = ('-gsplit-dwarf', '-fprofile-', '-fauto-profile', '-fbranch-probabilities')
+
+    def __init__(self, args):
+        """
+        :param args: command line, the compiler first
+        """
+        self.args = args
+        self.output = None
+        self.depfile = None
+        self.sources = []
+        # The command without the -c, -o and dependency options, used to preprocess the source
+        self.preprocess_args = [args[0]]
+
+        writes_depfile = False
+        arguments = iter(args[1:])
+        for arg in arguments:
+            if arg == '-o':
+                self.output = next(arguments, None)
+            elif arg in self.DEPENDENCY_OPTIONS:
+                writes_depfile = writes_depfile or arg in ('-MD', '-MMD')
+                value = next(arguments, None) if arg in self.DEPENDENCY_OPTIONS_WITH_VALUE else None
+                if arg == '-MF':
+                    self.depfile = value
+            elif arg != '-c':
+                if not arg.startswith('-') and arg.endswith('.c'):
+                    self.sources.append(arg)
+                self.preprocess_args.append(arg)
+        self.preprocess_args.append('-E')
+
+        if writes_depfile and self.depfile is None and self.output is not None:
+            # Without -MF the compiler puts the dependency file next to the object
+            self.depfile = os.path.splitext(self.output)[0] + '.d'
+        elif not writes_depfile:
+            self.depfile = None
+
+    def cacheable(self):
+        """
+        :return: True if the command compiles exactly one source file into an object file, which depends only
+                 on the command and the preprocessed source (see UNCACHEABLE_PREFIXES)
+        """
+        return ('-c' in self.args and self.output is not None and len(self.sources) == 1
+                and not any(arg.startswith(self.UNCACHEABLE_PREFIXES) for arg in self.args))
+
+    def compiler_identity(self):
+        """
+        Identify the compiler by its path, modification time and size, so upgrading it invalidates the cache
+        without having to run it
+        :return: str identifying the compiler
+        """
+        import shutil
+
+        path = shutil.which(self.args[0])
+        if path is None:
+            return self.args[0]
+        stat = os.stat(path)
+        return "{}:{}:{}".format(os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+
+    def hash(self):
+        """
+        Compute the key of the object: a hash of the compiler, the command line and the preprocessed source
+        :return: hex digest, or None if the source could not be preprocessed
+        """
+        import hashlib
+        import subprocess
+
+        preprocessed = subprocess.run(self.preprocess_args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        if preprocessed.returncode != 0:
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(self.compiler_identity().encode())
+        digest.update(b"\0".join(arg.encode() for arg in self.args))
+        # Debug information contains the absolute path of the working directory
+        if any(arg.startswith('-g') for arg in self.args):
+            digest.update(os.getcwd().encode())
+        digest.update(preprocessed.stdout)
+        return digest.hexdigest()
+
+
+class ObjectCache:
+    """
+    Content-addressed cache of object files. Objects are stored under the hash of the compiler, the command line
+    and the preprocessed source, together with their dependency files and the messages (e.g. warnings) the compiler
+    printed. When the cache grows over its maximum size, the least recently used objects are evicted.
+    """
+    DEFAULT_MAX_SIZE = "5G"
+    STATS_FILE = "stats.json"
+    LOCK_FILE = "lock"
+    # Objects are spread over 16 directories by the first character of their hash. Each directory is cleaned up
+    # separately, so storing an object never has to look at the whole cache.
+    SUBDIRECTORIES = "0123456789abcdef"
+    # Files stored next to an object: its dependency file and the messages of the compiler (only if there were any)
+    COMPANION_EXTENSIONS = ('.d', '.err')
+
+    def __init__(self, directory=None, max_size=None):
+        """
+        :param directory: cache directory, by default $CPM_CACHE_DIR or ~/.cache/cpm/objects
+        :param max_size: maximum size in bytes, by default $CPM_CACHE_MAX_SIZE or 5G
+        """
+        if directory is None:
+            cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+            directory = os.environ.get('CPM_CACHE_DIR', os.path.join(cache_home, 'cpm', 'objects'))
+        if max_size is None:
+            max_size = parse_size(os.environ.get('CPM_CACHE_MAX_SIZE', self.DEFAULT_MAX_SIZE))
+
+        self.directory = directory
+        self.max_size = max_size
+
+    def entry_path(self, key, extension):
+        """
+        :param key: hash of the object
+        :param extension: .o for the object, .d for its dependency file, .err for the messages of the compiler
+        :return: path of the cache entry
+        """
+        return os.path.join(self.directory, key[0], key + extension)
+
+    @contextmanager
+    def locked(self):
+        """
+        Hold an exclusive lock on the cache (e.g. while updating the statistics) - make -j runs many compilations
+        at the same time
+        """
+        import fcntl
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, self.LOCK_FILE), mode='w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def read_stats(self):
+        """
+        :return: dict with the numbers of hits and misses
+        """
+        try:
+            with open(os.path.join(self.directory, self.STATS_FILE), mode='r') as stats_file:
+                return json.load(stats_file)
+        except (OSError, ValueError):
+            return {'hits': 0, 'misses': 0}
+
+    def count(self, counter):
+        """
+        Increase one of the counters in the statistics
+        :param counter: hits or misses
+        """
+        with self.locked():
+            stats = self.read_stats()
+            stats[counter] = stats.get(counter, 0) + 1
+            with open(os.path.join(self.directory, self.STATS_FILE), mode='w') as stats_file:
+                json.dump(stats, stats_file)
+
+    @staticmethod
+    def write(path, data):
+        """
+        Write the file through a temporary file, so it is never seen half-written
+        :param path: path of the file
+        :param data: contents of the file as bytes
+        """
+        import tempfile
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, mode='wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def copy(source, destination):
+        """
+        Copy the file through a temporary file, so the destination is never seen half-written
+        :param source: path of the file to copy
+        :param destination: path of the copy
+        """
+        import shutil
+        import tempfile
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(destination)), suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(source, temp_path)
+            os.replace(temp_path, destination)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def fetch(self, key, command):
+        """
+        Copy the cached object (and its dependency file) to where the command would write them
+        :param key: hash of the object
+        :param command: CompileCommand
+        :return: messages the compiler printed when the object was compiled (empty if none) on a cache hit,
+                 None on a miss
+        """
+        object_entry = self.entry_path(key, '.o')
+        # Another compilation may evict the entry at any time (make -j), which makes it a miss
+        try:
+            self.copy(object_entry, command.output)
+            if command.depfile is not None:
+                self.copy(self.entry_path(key, '.d'), command.depfile)
+            # Bump the modification time, which is what the least recently used objects are evicted by
+            os.utime(object_entry)
+        except FileNotFoundError:
+            return None
+
+        try:
+            with open(self.entry_path(key, '.err'), mode='rb') as messages:
+                return messages.read()
+        except FileNotFoundError:
+            return b""
+
+    def store(self, key, command, messages):
+        """
+        Store the object (and its dependency file) produced by the command
+        :param key: hash of the object
+        :param command: CompileCommand
+        :param messages: messages the compiler printed, as bytes
+        """
+        os.makedirs(os.path.join(self.directory, key[0]), exist_ok=True)
+        # The other files are stored first, so a cached object always has them
+        if command.depfile is not None:
+            self.copy(command.depfile, self.entry_path(key, '.d'))
+        if messages:
+            self.write(self.entry_path(key, '.err'), messages)
+        self.copy(command.output, self.entry_path(key, '.o'))
+        with self.locked():
+            self.evict(key[0], self.max_size // len(self.SUBDIRECTORIES))
+
+    def entries(self, subdirectory):
+        """
+        :param subdirectory: one of SUBDIRECTORIES
+        :return: list of (modification time, size, path) of the objects, with their companion files counted in
+        """
+        entries = []
+        try:
+            scanned = list(os.scandir(os.path.join(self.directory, subdirectory)))
+        except FileNotFoundError:
+            return entries
+
+        sizes = {entry.name: entry.stat().st_size for entry in scanned}
+        for entry in scanned:
+            if entry.name.endswith('.o'):
+                size = sizes[entry.name] + sum(sizes.get(entry.name[:-2] + extension, 0)
+                                               for extension in self.COMPANION_EXTENSIONS)
+                entries.append((entry.stat().st_mtime_ns, size, entry.path))
+        return entries
+
+    def evict(self, subdirectory, max_size):
+        """
+        Remove the least recently used objects from the subdirectory until it fits in the size
+        :param subdirectory: one of SUBDIRECTORIES
+        :param max_size: maximum size of the subdirectory in bytes
+        :return: number of removed objects
+        """
+        entries = sorted(self.entries(subdirectory))
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= max_size:
+                break
+            for entry_path in [path] + [path[:-2] + extension for extension in self.COMPANION_EXTENSIONS]:
+                try:
+                    os.remove(entry_path)
+                except FileNotFoundError:
+                    pass
+            size -= entry_size
+            removed += 1
+        return removed
+
+    def compile(self, args):
+        """
+        Run the compile command, serving the object from the cache when possible
+        :param args: compile command line
+        :return: exit code of the compiler
+        """
+        import subprocess
+
+        command = CompileCommand(args)
+        key = command.hash() if command.cacheable() else None
+        if key is None:
+            # Not a plain compilation (or it does not even preprocess) - just run it and let it report any errors
+            return subprocess.run(args).returncode
+
+        messages = self.fetch(key, command)
+        if messages is not None:
+            sys.stderr.buffer.write(messages)
+            sys.stderr.flush()
+            self.count('hits')
+            return 0
+
+        # The messages are kept with the object, so warnings are printed on the cache hits as well
+        result = subprocess.run(args, stderr=subprocess.PIPE)
+        sys.stderr.buffer.write(result.stderr)
+        sys.stderr.flush()
+        if result.returncode == 0:
+            self.store(key, command, result.stderr)
+            self.count('misses')
+        return result.returncode
+
+    def stats(self):
+        """
+        :return: dict with the number of objects, their total size, and the numbers of hits and misses
+        """
+        entries = [entry for subdirectory in self.SUBDIRECTORIES for entry in self.entries(subdirectory)]
+        stats = self.read_stats()
+        stats['objects'] = len(entries)
+        stats['size'] = sum(entry[1] for entry in entries)
+        return stats
+
+    def prune(self, max_size):
+        """
+        Evict the least recently used objects until the cache fits in the size
+        :param max_size: maximum size in bytes
+        :return: number of removed objects
+        """
+        return sum(self.evict(subdirectory, max_size // len(self.SUBDIRECTORIES))
+                   for subdirectory in self.SUBDIRECTORIES)
+
+
+class Cache(Submanager):
+    """
+    Manages the object cache
+    """
+
+    def __init__(self, verbose_obj, object_cache=None):
+        """
+        :param verbose_obj: Verbose object
+        :param object_cache: ObjectCache, by default the one configured by the environment
+        """
+        super().__init__(verbose_obj)
+        self.object_cache = object_cache if object_cache is not None else ObjectCache()
+
+    @staticmethod
+    def add_subparser(subparsers):
+        """
+        Set up the cache option and all its arguments
+        :param subparsers: subparsers of the argument parser
+        """
+        parser = subparsers.add_parser('cache', help='manages the cache of compiled objects')
+        parser.add_argument('-v', '--verbose', action='count')
+        actions = parser.add_subparsers(dest='action', metavar='action')
+        actions.required = True
+
+        actions.add_parser('stats', help='print the cache statistics')
+        prune = actions.add_parser('prune', help='remove the least recently used objects')
+        prune.add_argument('--max-size', type=parse_size,
+                           help='size to shrink the cache to, e.g. 500M (default: the maximum cache size)')
+        prune.add_argument('--all', action='store_true', help='remove all objects')
+        compile_parser = actions.add_parser('compile', help='run a compile command through the cache '
+                                                            '(used by the build files)')
+        compile_parser.add_argument('command', nargs=argparse.REMAINDER, help='compile command, e.g. -- gcc -c ...')
+
+        # Set a function that will be called to handle the arguments
+        parser.set_defaults(function=Cache.handle_args)
+
+    @staticmethod
+    def handle_args(args, verbose):
+        """
+        Handle the program arguments
+        :param args: Program arguments
+        :param verbose: Verbose object
+        """
+        cache = Cache(verbose)
+        if args.action == 'compile':
+            command = args.command[1:] if args.command[:1] == ['--'] else args.command
+            if not command:
+                Verbose.print_any_level(MessageType.ERROR, "no compile command given")
+                sys.exit(2)
+            sys.exit(cache.object_cache.compile(command))
+        elif args.action == 'stats':
+            cache.print_stats()
+        else:
+            cache.prune(0 if args.all else args.max_size)
+
+    def print_stats(self):
+        """
+        Print the statistics of the cache
+        """
+        stats = self.object_cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = 100 * stats['hits'] / lookups if lookups else 0
+        Verbose.print_any_level(MessageType.INFO, "Cache directory: {}".format(self.object_cache.directory))
+        Verbose.print_any_level(MessageType.INFO, "Objects: {}".format(stats['objects']))
+        Verbose.print_any_level(MessageType.INFO, "Size: {} (max {})".format(format_size(stats['size']),
+                                                                          format_size(self.object_cache.max_size)))
+        Verbose.print_any_level(MessageType.INFO, "Hits: {}, misses: {} ({:.1f}% hit rate)"
+                                .format(stats['hits'], stats['misses'], hit_rate))
+
+    def prune(self, max_size=None):
+        """
+        Remove the least recently used objects
+        :param max_size: size to shrink the cache to, by default the maximum size of the cache
+        """
+        removed = self.object_cache.prune(self.object_cache.max_size if max_size is None else max_size)
+        Verbose.print_any_level(MessageType.INFO, "Removed {} objects".format(removed))
@@ -0,0 +1,47 @@
+import json
+import os
+
+from scripts.files import atomic_write
+
+# Directory inside the project where cpm keeps its files (configuration, include index etc.)
+CPM_DIRECTORY = ".cpm"
+
+
+class ProjectConfig:
+    """
+    Project settings that cpm needs to remember between runs, e.g. when regenerating the build files.
+    They are stored in .cpm/config.json inside the project directory.
+    """
+    FILENAME = "config.json"
+    DEFAULTS = {
+        'pch': None,  # Precompiled header, relative to the src directory
+        'unity': 0,  # Number of unity build batches, 0 if unity builds are not used
+    }
+
+    def __init__(self, project_dir):
+        """
+        Load the configuration of the project. Missing settings have their default values.
+        :param project_dir: project directory
+        """
+        self.path = os.path.join(project_dir, CPM_DIRECTORY, self.FILENAME)
+        self.settings = dict(self.DEFAULTS)
+        try:
+            with open(self.path, mode='r') as config_file:
+                self.settings.update(json.load(config_file))
+        except FileNotFoundError:
+            pass
+
+    def __getitem__(self, key):
+        return self.settings[key]
+
+    def __setitem__(self, key, value):
+        if key not in self.DEFAULTS:
+            raise KeyError("unknown setting: {}".format(key))
+        self.settings[key] = value
+
+    def save(self):
+        """
+        Save the configuration
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write(self.path, json.dumps(self.settings, indent=4, sort_keys=True) + "\n")
@@ -0,0 +1,279 @@
+import json
+import os
+import sys
+
+from scripts.cache import format_size
+from scripts.files import find_files
+from scripts.index import INDEXED_EXTENSIONS, IncludeIndex
+from scripts.submanager import Submanager
+from scripts.sync import Sync
+from scripts.verbose import Verbose, MessageType
+
+
+class IncludeGraph:
+    """
+    Graph of the #include directives between the files inside the src directory. Included paths are resolved
+    the way the compiler does for the files of a project: relative to the including file first, then relative
+    to the src directory. Anything that is not inside src (e.g. system headers) is left out.
+    """
+
+    def __init__(self, includes, sizes=None):
+        """
+        :param includes: dict mapping the paths of the files (relative to src) to the lists of paths they include,
+                         as written in the #include directives
+        :param sizes: dict mapping the paths of the files to their sizes in bytes
+        """
+        self.sizes = sizes if sizes is not None else {}
+        self.edges = {file: [] for file in includes}
+        for file, included_paths in includes.items():
+            for included_path in included_paths:
+                resolved = self.resolve(file, included_path)
+                if resolved is not None and resolved not in self.edges[file]:
+                    self.edges[file].append(resolved)
+
+    @staticmethod
+    def from_index(src_dir, map_function=map):
+        """
+        Build the graph of the project from the include index, bringing the index up to date first
+        :param src_dir: src directory of the project
+        :param map_function: function used to parse the files that are not up to date in the index
+        :return: IncludeGraph
+        """
+        index = IncludeIndex(src_dir)
+        index.load()
+        index.refresh(find_files(src_dir, INDEXED_EXTENSIONS), map_function)
+        try:
+            index.save()
+        except OSError:
+            # Only makes the next run slower
+            pass
+        return IncludeGraph({file: entry['includes'] for file, entry in index.files.items()},
+                            {file: entry['size'] for file, entry in index.files.items()})
+
+    def resolve(self, file, included_path):
+        """
+        Find the file the include directive refers to
+        :param file: path of the including file, relative to src
+        :param included_path: path as written in the directive
+        :return: path of the included file relative to src, or None if it is not inside src
+        """
+        for candidate in (os.path.join(os.path.dirname(file), included_path), included_path):
+            candidate = os.path.normpath(candidate)
+            if candidate in self.edges:
+                return candidate
+        return None
+
+    def translation_units(self):
+        """
+        :return: sorted list of the source files
+        """
+        return sorted(file for file in self.edges if file.endswith('.c'))
+
+    def headers(self):
+        """
+        :return: sorted list of the headers
+        """
+        return sorted(file for file in self.edges if not file.endswith('.c'))
+
+    def reachable(self, file):
+        """
+        Get everything the file includes, directly or through other headers
+        :param file: path of the file relative to src
+        :return: set of the included files
+        """
+        seen = set()
+        stack = list(self.edges[file])
+        while stack:
+            included = stack.pop()
+            if included not in seen:
+                seen.add(included)
+                stack.extend(self.edges[included])
+        return seen
+
+    def header_stats(self):
+        """
+        Count for each header how many translation units include it directly and transitively (i.e. are recompiled
+        when the header changes), and how many files it includes itself
+        :return: dict mapping the headers to dicts with the direct, transitive, fan_out and size values
+        """
+        stats = {header: {'direct': 0, 'transitive': 0, 'fan_out': len(self.edges[header]),
+                          'size': self.sizes.get(header, 0)} for header in self.headers()}
+        for unit in self.translation_units():
+            for header in self.edges[unit]:
+                if header in stats:
+                    stats[header]['direct'] += 1
+            for header in self.reachable(unit):
+                if header in stats:
+                    stats[header]['transitive'] += 1
+        return stats
+
+    def heaviest_chain(self, file, memo, active):
+        """
+        Find the chain of includes starting at the file with the largest total size
+        :param file: path of the file relative to src
+        :param memo: dict with the chains found so far
+        :param active: set of the files on the current chain, include cycles are cut where they close
+        :return: tuple of the total size, the list of files of the chain and whether an include cycle was cut.
+                 Chains with a cut cycle depend on where the search started, so they are not kept in the memo.
+        """
+        if file in memo:
+            return memo[file] + (False,)
+
+        active.add(file)
+        best = (0, [])
+        cut = False
+        for included in self.edges[file]:
+            if included in active:
+                cut = True
+                continue
+            size, chain, included_cut = self.heaviest_chain(included, memo, active)
+            cut = cut or included_cut
+            best = max(best, (size, chain))
+        active.discard(file)
+
+        result = (self.sizes.get(file, 0) + best[0], [file] + best[1])
+        if not cut:
+            memo[file] = result
+        return result + (cut,)
+
+    def expensive_chains(self, count, stats=None):
+        """
+        Find the most expensive include chains. For every header the heaviest chain of headers starting with it
+        is taken. Every translation unit including the header (directly or through other headers) reads the whole
+        chain, so the chains are ranked by the number of bytes the compiler reads through them in the whole build,
+        i.e. the size of the chain times the number of units including its first header. A chain which is only
+        the end of a longer chain read by the same units is left out.
+        :param count: maximum number of chains
+        :param stats: header statistics (see header_stats), if they have already been computed
+        :return: list of dicts with the files of the chain, the number of units and the cost in bytes
+        """
+        stats = self.header_stats() if stats is None else stats
+        memo = {}
+        chains = {}
+        for header in self.headers():
+            units = stats[header]['transitive']
+            if units > 0:
+                size, chain, _ = self.heaviest_chain(header, memo, set())
+                chains[tuple(chain)] = {'files': chain, 'units': units, 'cost': size * units}
+
+        for chain, entry in list(chains.items()):
+            tail = chains.get(chain[1:])
+            if tail is not None and tail['units'] == entry['units']:
+                del chains[chain[1:]]
+        return sorted(chains.values(), key=lambda chain: (-chain['cost'], chain['files']))[:count]
+
+    def to_json(self, count):
+        """
+        :param count: maximum number of the expensive chains
+        :return: the graph, the header statistics and the expensive chains as a JSON string
+        """
+        stats = self.header_stats()
+        return json.dumps({'includes': self.edges, 'headers': stats,
+                           'chains': self.expensive_chains(count, stats)}, indent=4, sort_keys=True)
+
+    def to_dot(self):
+        """
+        :return: the graph in the DOT language, headers are labeled with the number of units including them
+        """
+        lines = ["digraph includes {"]
+        for header, stats in sorted(self.header_stats().items()):
+            lines.append('    "{}" [label="{}\\n{} units"];'.format(header, header, stats['transitive']))
+        for file in sorted(self.edges):
+            for included in self.edges[file]:
+                lines.append('    "{}" -> "{}";'.format(file, included))
+        lines.append("}")
+        return "\n".join(lines)
+
+
+class Deps(Submanager):
+    """
+    Analyses the include graph of a project, to find the headers that cause the most recompilation
+    """
+    FORMATS = ("text", "json", "dot")
+
+    def __init__(self, verbose_obj, project_dir):
+        """
+        :param verbose_obj: Verbose object
+        :param project_dir: project directory
+        """
+        super().__init__(verbose_obj)
+        self.project_dir = project_dir
+        self.src_dir = os.path.join(project_dir, "src")
+
+    @staticmethod
+    def add_subparser(subparsers):
+        """
+        Set up the deps option and all its arguments
+        :param subparsers: subparsers of the argument parser
+        """
+        parser = subparsers.add_parser('deps', help='analyses the include graph of the project')
+        parser.add_argument('-n', '--count', type=int, default=20,
+                            help='number of headers and include chains to print (default: 20)')
+        parser.add_argument('-f', '--format', choices=Deps.FORMATS, default="text",
+                            help='print a report (default), or export the graph as JSON or DOT')
+        parser.add_argument('-o', '--output', metavar='file', help='write the export into the file')
+        parser.add_argument('-v', '--verbose', action='count')
+        # Set a function that will be called to handle the arguments
+        parser.set_defaults(function=Deps.handle_args)
+
+    @staticmethod
+    def handle_args(args, verbose):
+        """
+        Handle the program arguments
+        :param args: Program arguments
+        :param verbose: Verbose object
+        """
+        project_dir = Sync.find_project_dir(os.getcwd())
+        if project_dir is None:
+            Verbose.print_any_level(MessageType.ERROR, "no project found in the current directory or its parents")
+            return
+
+        deps = Deps(verbose, project_dir)
+        if args.format == "text":
+            deps.print_report(args.count)
+        else:
+            deps.export(args.format, args.count, args.output)
+
+    def print_report(self, count=20):
+        """
+        Print the headers included by the most translation units and the most expensive include chains
+        :param count: number of headers and chains to print
+        """
+        graph = IncludeGraph.from_index(self.src_dir)
+        stats = graph.header_stats()
+        Verbose.print_any_level(MessageType.INFO, "{} translation units, {} headers"
+                                .format(len(graph.translation_units()), len(stats)))
+        if not stats:
+            return
+
+        Verbose.print_any_level(MessageType.INFO,
+                                "{:>8} {:>10} {:>8}  header".format("direct", "transitive", "fan-out"))
+        ranked = sorted(stats.items(), key=lambda item: (-item[1]['transitive'], -item[1]['direct'], item[0]))
+        for header, header_stats in ranked[:count]:
+            Verbose.print_any_level(MessageType.INFO, "{:>8} {:>10} {:>8}  {}".format(
+                header_stats['direct'], header_stats['transitive'], header_stats['fan_out'], header))
+
+        chains = graph.expensive_chains(count, stats)
+        if chains:
+            Verbose.print_any_level(MessageType.INFO, "Most expensive include chains (size x units including "
+                                                      "the first header directly or transitively):")
+        for chain in chains:
+            Verbose.print_any_level(MessageType.INFO, "{:>10} {:>5} units  {}".format(
+                format_size(chain['cost']), chain['units'], " -> ".join(chain['files'])))
+
+    def export(self, export_format, count=20, output=None):
+        """
+        Export the include graph
+        :param export_format: json or dot
+        :param count: number of the expensive chains in the JSON export
+        :param output: path of the file to write the export into, None to print it
+        """
+        graph = IncludeGraph.from_index(self.src_dir)
+        text = (graph.to_json(count) if export_format == "json" else graph.to_dot()) + "\n"
+        if output is None:
+            sys.stdout.write(text)
+            return
+
+        with open(output, mode='w') as output_file:
+            output_file.write(text)
+        self.verbose.print(MessageType.INFO, "Exported the include graph to {}".format(output))
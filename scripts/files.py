@@ -0,0 +1,93 @@
+import os
+import tempfile
+
+# Directory with the templates of the created files
+TEMPLATES_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "templates"))
+
+# Source files are not guaranteed to be valid UTF-8. With surrogateescape any undecodable bytes survive
+# a decode/encode round trip unchanged, so rewriting a file never alters the parts that were not touched.
+ENCODING = 'utf-8'
+ERRORS = 'surrogateescape'
+
+
+def find_files(directory, extensions):
+    """
+    Get all files with one of the given extensions inside the directory and its subdirectories
+    :param directory: directory to search
+    :param extensions: tuple of extensions, e.g. ('.c', '.h')
+    :return: list of paths of the files
+    """
+    files_list = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.endswith(extensions):
+                files_list.append(os.path.join(root, file))
+    return files_list
+
+
+def read_text(path):
+    """
+    Read the whole file in one go
+    :param path: path of the file
+    :return: contents of the file as str
+    """
+    with open(path, mode='r', encoding=ENCODING, errors=ERRORS, newline='') as file:
+        return file.read()
+
+
+def read_template(filename):
+    """
+    Read a template. The loader of this module is used rather than open(), so the templates can also be read
+    when cpm runs from a zipapp.
+    :param filename: name of the template file, e.g. module.c.txt
+    :return: contents of the template as str
+    """
+    # Inside a zipapp the path has to start with the path of the archive exactly as the loader got it (which may be
+    # relative), while __file__ is always absolute
+    archive = getattr(__loader__, 'archive', None)
+    templates_dir = os.path.join(archive, "templates") if archive is not None else TEMPLATES_DIR
+    return __loader__.get_data(os.path.join(templates_dir, filename)).decode(ENCODING)
+
+
+def atomic_write(path, text):
+    """
+    Replace the contents of the file atomically. The text is written to a temporary file in the same directory
+    which is then renamed over the original, so the file is never left half-written. The permissions
+    of an existing file are kept.
+    :param path: path of the file
+    :param text: new contents
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with open(fd, mode='w', encoding=ENCODING, errors=ERRORS, newline='') as file:
+            file.write(text)
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            # The file is new, mkstemp creates files readable only by the owner so apply the default permissions
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def update_file(path, text):
+    """
+    Write the text to the file, unless the file already has exactly the same contents.
+    An unchanged file keeps its modification time, so it does not cause anything to be rebuilt.
+    :param path: path of the file
+    :param text: new contents
+    :return: True if the file was written
+    """
+    try:
+        if read_text(path) == text:
+            return False
+    except FileNotFoundError:
+        pass
+
+    atomic_write(path, text)
+    return True
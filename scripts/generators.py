@@ -0,0 +1,379 @@
+import json
+import os
+import re
+import shlex
+import subprocess
+from abc import ABC, abstractmethod
+
+from scripts.config import CPM_DIRECTORY, ProjectConfig
+from scripts.files import update_file
+from scripts.template import Templates
+
+# Directory with the generated unity build sources, relative to the project directory
+UNITY_DIR = os.path.join(CPM_DIRECTORY, "unity")
+# Compilation database read by language servers and other tools, in the project directory
+COMPILE_COMMANDS_FILE = "compile_commands.json"
+
+
+class BuildFilesError(Exception):
+    """
+    The build files cannot be evaluated, e.g. the makefile has an error
+    """
+
+
+class Generator(ABC):
+    """
+    Base class of the build file generators. A generator creates the main build file of a project once
+    (from a template, so it can be edited by the user afterwards) and keeps a separate, generated file with the list
+    of all sources up to date.
+    """
+    NAME = None  # Name used to select the generator, e.g. cpm project --generator make
+    BUILD_FILE = None  # Main build file, created from the template
+    TEMPLATE = None  # Template of the main build file
+    SOURCES_FILE = None  # Generated file with the sources, included by the main build file
+    OBJ_DIR = None  # How the build (object) directory is referred to in the build files
+    BUILD_TOOL = None  # Program building the project from the build files
+    DEFAULT_COMPILER = ["gcc"]  # Compiler in the compilation database, if the build files cannot tell
+    PROFILES = ()  # Build profiles defined by the template, e.g. make PROFILE=release
+    DEFAULT_PROFILE = None
+
+    def __init__(self, project_dir):
+        """
+        :param project_dir: project directory
+        """
+        self.project_dir = project_dir
+        self.config = ProjectConfig(project_dir)
+
+    @staticmethod
+    def detect(project_dir):
+        """
+        Find out which generator was used to create the project
+        :param project_dir: project directory
+        :return: generator class, or None if the directory does not contain any known build file
+        """
+        for generator in GENERATORS.values():
+            if os.path.isfile(os.path.join(project_dir, generator.BUILD_FILE)):
+                return generator
+        return None
+
+    def create(self, project_name, profile=None):
+        """
+        Create the main build file from the template
+        :param project_name: name of the project, substituted for [PROJECT_NAME]
+        :param profile: default build profile, substituted for [PROFILE] (None for the generator's default)
+        """
+        profile = self.DEFAULT_PROFILE if profile is None else profile
+        build_file_path = os.path.join(self.project_dir, self.BUILD_FILE)
+        text = Templates.for_project(self.project_dir).render(self.TEMPLATE, {'PROJECT_NAME': project_name,
+                                                                               'PROFILE': str(profile)})
+
+        with open(build_file_path, mode='w') as build_file:
+            build_file.write(text)
+
+    def get_object(self, source):
+        """
+        Get the object file the source file is compiled to. The objects mirror the structure of the src directory,
+        so source files with the same name in different directories never share an object.
+        Unity build sources are compiled into the unity subdirectory.
+        :param source: path of the source file relative to the project directory
+        :return: path of the object file inside the build directory
+        """
+        if os.path.dirname(source) == UNITY_DIR:
+            return self.OBJ_DIR + "/unity/" + os.path.splitext(os.path.basename(source))[0] + ".o"
+        return self.OBJ_DIR + "/" + os.path.splitext(os.path.relpath(source, "src"))[0] + ".o"
+
+    def get_unity_batches(self, sources):
+        """
+        Split the sources into the configured number of batches for the unity build. The batches are contiguous
+        ranges of the sorted sources (so files from the same directory, which usually include the same headers,
+        end up together) with roughly the same total size.
+        :param sources: sorted list of source files relative to the project directory
+        :return: list of batches, each being a list of sources
+        """
+        count = min(self.config['unity'], len(sources))
+        if count <= 0:
+            return []
+
+        sizes = [os.path.getsize(os.path.join(self.project_dir, source)) for source in sources]
+        target = sum(sizes) / count
+        batches = []
+        start = 0
+        total = 0
+        for number in range(1, count):
+            # Fill the batch up to its share of the total size, leaving at least one source for each remaining batch
+            end = start + 1
+            total += sizes[start]
+            while end < len(sources) - (count - number) and total + sizes[end] <= target * number:
+                total += sizes[end]
+                end += 1
+            batches.append(sources[start:end])
+            start = end
+        batches.append(sources[start:])
+        return batches
+
+    def sync_unity(self, sources):
+        """
+        Update the unity build sources. Each of them includes all sources of its batch, after the precompiled
+        header (if the project has one), which is only used when it is included first.
+        Only the batches that have changed are rewritten, and the ones no longer needed are removed.
+        :param sources: sorted list of source files relative to the project directory
+        :return: list of unity build sources relative to the project directory
+        """
+        unity_dir = os.path.join(self.project_dir, UNITY_DIR)
+        unity_sources = []
+        for number, batch in enumerate(self.get_unity_batches(sources), start=1):
+            unity_source = os.path.join(UNITY_DIR, "unity_{}.c".format(number))
+            unity_sources.append(unity_source)
+            lines = ["/* Generated by cpm sync. Do not edit. */"]
+            if self.config['pch'] is not None:
+                lines.append('#include "{}"'.format(self.config['pch']))
+            lines += ['#include "{}"'.format(os.path.relpath(source, UNITY_DIR)) for source in batch]
+            os.makedirs(unity_dir, exist_ok=True)
+            update_file(os.path.join(self.project_dir, unity_source), "\n".join(lines) + "\n")
+
+        if os.path.isdir(unity_dir):
+            for filename in os.listdir(unity_dir):
+                if os.path.join(UNITY_DIR, filename) not in unity_sources:
+                    os.remove(os.path.join(unity_dir, filename))
+        return unity_sources
+
+    @abstractmethod
+    def generate_sources(self, sources, unity_sources):
+        """
+        Generate the contents of the sources file
+        :param sources: sorted list of source files relative to the project directory
+        :param unity_sources: list of unity build sources relative to the project directory
+        :return: contents of the file
+        """
+
+    @abstractmethod
+    def compile_settings(self):
+        """
+        Find out how the build files compile the sources
+        :return: tuple of the compiler command with all flags (list of arguments) and the build directory
+        :raises BuildFilesError: if the build files cannot be evaluated
+        """
+
+    def compile_commands(self, sources):
+        """
+        Generate the compilation database, with an entry for each source
+        :param sources: sorted list of source files relative to the project directory
+        :return: list of the entries
+        """
+        compiler, build_dir = self.compile_settings()
+        directory = os.path.abspath(self.project_dir)
+        entries = []
+        for source in sources:
+            output = build_dir + self.get_object(source)[len(self.OBJ_DIR):]
+            entries.append({'directory': directory, 'file': source, 'output': output,
+                            'arguments': compiler + ['-c', source, '-o', output]})
+        return entries
+
+    def sync(self, sources):
+        """
+        Update the sources file (and the unity build sources)
+        :param sources: sorted list of source files relative to the project directory
+        :return: True if the sources file has changed
+        """
+        unity_sources = self.sync_unity(sources)
+        return update_file(os.path.join(self.project_dir, self.SOURCES_FILE),
+                           self.generate_sources(sources, unity_sources))
+
+    def sync_compile_commands(self, sources):
+        """
+        Update the compilation database. It has to be done after the sources file is updated, the build files
+        include it when the settings are read from them.
+        :param sources: sorted list of source files relative to the project directory
+        :raises BuildFilesError: if the build files cannot be evaluated, the database is then left as it is
+        """
+        update_file(os.path.join(self.project_dir, COMPILE_COMMANDS_FILE),
+                    json.dumps(self.compile_commands(sources), indent=4) + "\n")
+
+
+class MakeGenerator(Generator):
+    """
+    Generates a makefile, with sources.mk listing the sources
+    """
+    NAME = "make"
+    BUILD_FILE = "makefile"
+    TEMPLATE = "makefile.txt"
+    SOURCES_FILE = "sources.mk"
+    OBJ_DIR = "$(OBJ)"
+    BUILD_TOOL = "make"
+    PROFILES = ("debug", "release", "fast", "lto")
+    DEFAULT_PROFILE = "debug"
+
+    def generate_sources(self, sources, unity_sources):
+        objects = [self.get_object(source) for source in sources]
+        unity_objects = [self.get_object(source) for source in unity_sources]
+        directories = sorted({os.path.dirname(obj) + "/" for obj in objects + unity_objects} | {self.OBJ_DIR + "/"})
+        lines = [
+            "# Generated by cpm sync. Do not edit - run cpm sync after adding or removing source files instead.",
+            "SOURCES = " + " ".join(sources),
+            "OBJECTS = " + " ".join(objects),
+            "OBJ_DIRS = " + " ".join(directories),
+            "",
+        ]
+        for source, obj in zip(sources, objects):
+            # The object directory is an order-only prerequisite - it has to exist, but its timestamp does not matter
+            lines.append("{}: {} | {}/".format(obj, source, os.path.dirname(obj)))
+            lines.append("\t$(COMPILE)")
+
+        # One archive for each directory with sources, named after the directory
+        archives = {}
+        root_objects = []
+        for source, obj in zip(sources, objects):
+            directory = os.path.dirname(os.path.relpath(source, "src"))
+            if directory:
+                archive = "{}/{}/lib{}.a".format(self.OBJ_DIR, directory, os.path.basename(directory))
+                archives.setdefault(archive, []).append(obj)
+            else:
+                root_objects.append(obj)
+        lines += [
+            "",
+            "# Static archives of the module directories, used with make ARCHIVES=1. The objects of the sources",
+            "# directly inside the src directory are linked on their own.",
+            "ROOT_OBJECTS = " + " ".join(root_objects),
+            "MODULE_ARCHIVES = " + " ".join(sorted(archives)),
+        ]
+        for archive in sorted(archives):
+            lines.append("{}: {}".format(archive, " ".join(archives[archive])))
+            lines.append("\t$(ARCHIVE)")
+
+        if unity_sources:
+            lines += [
+                "",
+                "# Unity build, selected with make UNITY=1. The sources are compiled in batches, each batch being",
+                "# a single translation unit which includes all of its sources.",
+                "UNITY_SOURCES = " + " ".join(unity_sources),
+                "UNITY_OBJECTS = " + " ".join(unity_objects),
+            ]
+            for source, obj in zip(unity_sources, unity_objects):
+                lines.append("{}: {} | {}/".format(obj, source, os.path.dirname(obj)))
+                lines.append("\t$(COMPILE)")
+            lines += [
+                "ifeq ($(UNITY),1)",
+                "OBJECTS = $(UNITY_OBJECTS)",
+                "endif",
+            ]
+
+        if self.config['pch'] is not None:
+            lines += [
+                "",
+                "# Precompiled header. It is compiled next to the header, and gcc uses it instead of the header",
+                "# when it is the first thing a source file includes. $(SRC) is added to the include path,",
+                "# so it can be included by its name from any directory. Every object directory (profile) has its",
+                "# own precompiled header inside the .gch directory, gcc picks the one compiled with matching flags.",
+                "PCH = $(SRC)/" + self.config['pch'],
+                "PCH_OUTPUT = $(PCH).gch/$(notdir $(OBJ)).gch",
+                "CFLAGS += -I$(SRC)",
+                "$(OBJECTS): $(PCH_OUTPUT)",
+                "$(PCH_OUTPUT): $(PCH) | $(OBJ)/",
+                "\t@mkdir -p $(@D)",
+                "\t$(COMPILER_LAUNCHER) $(CC) -x c-header -c $< $(CFLAGS) -MMD -MP -MF $(OBJ)/pch.d -MT $@ -o $@",
+                "-include $(OBJ)/pch.d",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def compile_settings(self):
+        # Let make evaluate the variables, so everything the user changed in the makefile (and the default profile)
+        # is taken into account. Nothing is built, the rule only prints the variables. DEPENDENCIES is emptied,
+        # so the dependency files are not read - for a big project that is most of the time make needs to start.
+        rule = "cpm-compile-settings:\n\t$(info $(CC) $(CFLAGS))\n\t$(info $(OBJ))\n\t@:\n"
+        environment = {name: value for name, value in os.environ.items() if name not in ('MAKEFLAGS', 'MFLAGS')}
+        try:
+            result = subprocess.run([self.BUILD_TOOL, "-s", "--no-print-directory", "-f", self.BUILD_FILE, "-f", "-",
+                                     "DEPENDENCIES=", "cpm-compile-settings"], input=rule, cwd=self.project_dir,
+                                    env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    universal_newlines=True)
+        except OSError as error:
+            raise BuildFilesError("{} cannot be run: {}".format(self.BUILD_TOOL, error.strerror))
+
+        lines = result.stdout.splitlines()
+        if result.returncode != 0 or len(lines) < 2:
+            errors = result.stderr.strip().splitlines()
+            raise BuildFilesError("{} cannot read the {}{}".format(self.BUILD_TOOL, self.BUILD_FILE,
+                                                                   ": " + errors[-1] if errors else ""))
+        return shlex.split(lines[0]), lines[1] or "build"
+
+
+class NinjaGenerator(Generator):
+    """
+    Generates build.ninja, with sources.ninja listing the sources
+    """
+    NAME = "ninja"
+    BUILD_FILE = "build.ninja"
+    TEMPLATE = "build.ninja.txt"
+    SOURCES_FILE = "sources.ninja"
+    OBJ_DIR = "$builddir"
+    BUILD_TOOL = "ninja"
+    # A variable assignment outside of any rule or build statement, and a variable reference
+    VARIABLE_REGEX = re.compile(r'^([A-Za-z0-9_.-]+)[ \t]*=[ \t]*(.*)$')
+    REFERENCE_REGEX = re.compile(r'\$\$|\$\{([A-Za-z0-9_.-]+)\}|\$([A-Za-z0-9_-]+)')
+
+    def generate_sources(self, sources, unity_sources):
+        objects = [self.get_object(source) for source in sources]
+        lines = ["# Generated by cpm sync. Do not edit - run cpm sync after adding or removing source files instead."]
+
+        implicit_inputs = ""
+        if self.config['pch'] is not None:
+            # Precompiled header, compiled next to the header. src is added to the include path,
+            # so it can be included by its name from any directory.
+            pch = "src/" + self.config['pch']
+            implicit_inputs = " | {}.gch".format(pch)
+            lines += [
+                "cflags = $cflags -Isrc -Winvalid-pch",
+                "rule pch",
+                "  command = $launcher $cc -x c-header -c $in $cflags -MMD -MF $out.d -o $out",
+                "  depfile = $out.d",
+                "  deps = gcc",
+                "  description = PCH $out",
+                "build {0}.gch: pch {0}".format(pch),
+            ]
+
+        # Ninja creates the directories of the outputs by itself, so there is no need for any directory rules
+        for source, obj in zip(sources, objects):
+            lines.append("build {}: cc {}{}".format(obj, source, implicit_inputs))
+        lines.append("build $binary: link " + " ".join(objects))
+
+        if unity_sources:
+            # Unity build (ninja unity): the sources are compiled in batches, each batch being a single
+            # translation unit which includes all of its sources
+            unity_objects = [self.get_object(source) for source in unity_sources]
+            for source, obj in zip(unity_sources, unity_objects):
+                lines.append("build {}: cc {}{}".format(obj, source, implicit_inputs))
+            lines.append("build ${binary}_unity: link " + " ".join(unity_objects))
+            lines.append("build unity: phony ${binary}_unity")
+        return "\n".join(lines) + "\n"
+
+    def read_variables(self, filename, variables):
+        """
+        Evaluate the top-level variables of the ninja file (and the files it includes)
+        :param filename: file relative to the project directory
+        :param variables: dict with the variables defined so far, updated in place
+        """
+        try:
+            with open(os.path.join(self.project_dir, filename), mode='r') as ninja_file:
+                lines = ninja_file.read().splitlines()
+        except OSError:
+            return
+
+        for line in lines:
+            if line.startswith("include "):
+                self.read_variables(line[len("include "):].strip(), variables)
+                continue
+            match = self.VARIABLE_REGEX.match(line)
+            if match is not None:
+                variables[match.group(1)] = self.REFERENCE_REGEX.sub(
+                    lambda reference: "$" if reference.group(0) == "$$"
+                    else variables.get(reference.group(1) or reference.group(2), ""), match.group(2))
+
+    def compile_settings(self):
+        variables = {}
+        self.read_variables(self.BUILD_FILE, variables)
+        compiler = shlex.split(variables['cc']) if 'cc' in variables else self.DEFAULT_COMPILER
+        return compiler + shlex.split(variables.get('cflags', "")), variables.get('builddir', "build")
+
+
+# All available generators, by their names
+GENERATORS = {generator.NAME: generator for generator in (MakeGenerator, NinjaGenerator)}
@@ -0,0 +1,118 @@
+import re
+from functools import lru_cache
+
+# Matches an #include directive, both the "quoted" and the <angle-bracket> form, and captures the included path.
+INCLUDE_REGEX = re.compile(r'^[ \t]*#[ \t]*include[ \t]*["<]([^">\n]+)[">]', re.MULTILINE)
+# Number of compiled rewriters kept for reuse. Renames mostly repeat within a single run, the bound only keeps
+# a long-running process (e.g. one using scripts.api) from collecting the patterns of every rename it ever made.
+REWRITER_CACHE_SIZE = 64
+
+
+def parse_includes(text):
+    """
+    Get all paths included with the #include directive in the given text
+    :param text: contents of a source or header file
+    :return: list of included paths in the order they appear in the text
+    """
+    return INCLUDE_REGEX.findall(text)
+
+
+class IncludeRewriter:
+    """
+    Renames modules inside #include directives. The pattern for all renamed modules is compiled once and a whole
+    file is rewritten in a single pass, so the cost of rewriting depends on the number of matches only.
+    Both the "quoted" and the <angle-bracket> forms are recognised, and the included path may contain any
+    directory components. If the header is inside a directory with the same name as the module (a module created
+    with a directory), the directory is renamed as well.
+    """
+
+    def __init__(self, renames):
+        """
+        :param renames: dict mapping old module names to new module names
+        """
+        self.renames = dict(renames)
+        # Longer names first, so a name that is a prefix of another one does not shadow it
+        names = "|".join(re.escape(name) for name in sorted(self.renames, key=len, reverse=True))
+        self.regex = re.compile(
+            # The directive itself and any leading directory components (matched lazily, so the module directory
+            # is left for the "directory" group)
+            r'^(?P<prefix>[ \t]*#[ \t]*include[ \t]*["<](?:[^">\n/]*/)*?)'
+            # Optional module directory, then the header file name which must end the included path
+            r'(?:(?P<directory>{0})/)?(?P<name>{0})\.h(?=[">])'.format(names),
+            re.MULTILINE)
+
+    @staticmethod
+    @lru_cache(maxsize=REWRITER_CACHE_SIZE)
+    def for_renames(renames):
+        """
+        Get a (cached) rewriter for the given renames
+        :param renames: tuple of (old name, new name) pairs
+        :return: IncludeRewriter
+        """
+        return IncludeRewriter(dict(renames))
+
+    @staticmethod
+    def for_rename(old_name, new_name):
+        """
+        Get a (cached) rewriter renaming a single module
+        :param old_name: old module name
+        :param new_name: new module name
+        :return: IncludeRewriter
+        """
+        return IncludeRewriter.for_renames(((old_name, new_name),))
+
+    def _replace(self, match):
+        """
+        Build the replacement for a single match of the regex
+        :param match: match object
+        :return: replacement string
+        """
+        name = match.group('name')
+        directory = match.group('directory')
+        replacement = self.renames[name] + '.h'
+        if directory is not None:
+            directory = self.renames[directory] if directory == name else directory
+            replacement = directory + '/' + replacement
+        return match.group('prefix') + replacement
+
+    def rewrite(self, text):
+        """
+        Rename the modules in all #include directives of the text
+        :param text: text to rewrite, e.g. the contents of a whole file
+        :return: tuple of the rewritten text and the number of modified directives
+        """
+        return self.regex.subn(self._replace, text)
+
+
+class GuardRewriter:
+    """
+    Renames the include-guard constants ([NAME]_H) of modules. The constants are also renamed in comments.
+    """
+
+    def __init__(self, renames):
+        """
+        :param renames: dict mapping old module names to new module names
+        """
+        self.renames = {old_name.upper(): new_name.upper() for old_name, new_name in renames.items()}
+        names = "|".join(re.escape(name) for name in sorted(self.renames, key=len, reverse=True))
+        # The constant must not be a part of a longer identifier
+        self.regex = re.compile(r'(?<![A-Za-z0-9_])({0})_H(?![A-Za-z0-9_])'.format(names))
+
+    @staticmethod
+    @lru_cache(maxsize=REWRITER_CACHE_SIZE)
+    def for_rename(old_name, new_name):
+        """
+        Get a (cached) rewriter renaming the include-guard of a single module
+        :param old_name: old module name
+        :param new_name: new module name
+        :return: GuardRewriter
+        """
+        return GuardRewriter({old_name: new_name})
+
+    def rewrite(self, text):
+        """
+        Rename the include-guard constants in the text
+        :param text: text to rewrite
+        :return: tuple of the rewritten text and the number of replacements
+        """
+        return self.regex.subn(lambda match: self.renames[match.group(1)] + '_H', text)
@@ -0,0 +1,122 @@
+import json
+import os
+
+from scripts.config import CPM_DIRECTORY
+from scripts.files import atomic_write
+from scripts.include import parse_includes
+
+# Files kept in the index. Everything using the index has to refresh it with the same files, as refreshing drops
+# the entries of the files not given.
+INDEXED_EXTENSIONS = ('.c', '.h')
+
+
+def scan_file(file):
+    """
+    Read the file and find all its includes
+    :param file: path of the file
+    :return: tuple of the modification time (in ns), the size and the list of included paths
+    """
+    stat = os.stat(file)
+    with open(file, mode='r', errors='replace') as source:
+        includes = parse_includes(source.read())
+    return stat.st_mtime_ns, stat.st_size, includes
+
+
+class IncludeIndex:
+    """
+    On-disk index of the #include directives used by the source files of a project.
+    It is stored inside the .cpm directory next to the src directory and maps every scanned file to the paths
+    it includes. When refreshed, only the files with a changed modification time or size are parsed again.
+    """
+    VERSION = 1
+    FILENAME = "include_index.json"
+
+    def __init__(self, src_dir):
+        """
+        :param src_dir: src directory of the project
+        """
+        self.src_dir = src_dir
+        self.path = os.path.join(os.path.dirname(src_dir), CPM_DIRECTORY, self.FILENAME)
+        # Relative path of a file -> {"mtime": modification time in ns, "size": size in bytes, "includes": [paths]}
+        self.files = {}
+        self.changed = False
+
+    def load(self):
+        """
+        Load the index from the disk. A missing, unreadable or outdated index is treated as an empty one.
+        """
+        try:
+            with open(self.path, mode='r') as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') == self.VERSION:
+            self.files = data.get('files', {})
+
+    def save(self):
+        """
+        Save the index to the disk, if it has changed since it was loaded
+        """
+        if not self.changed:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write(self.path, json.dumps({'version': self.VERSION, 'files': self.files}))
+        self.changed = False
+
+    def _store(self, file, scan_result):
+        """
+        Store the result of scan_file in the index
+        :param file: absolute path of the scanned file
+        :param scan_result: tuple returned by scan_file
+        """
+        mtime, size, includes = scan_result
+        self.files[os.path.relpath(file, self.src_dir)] = {'mtime': mtime, 'size': size, 'includes': includes}
+        self.changed = True
+
+    def refresh(self, files, map_function=map):
+        """
+        Bring the index up to date with the given files. Files that are new or modified are parsed,
+        and files that are no longer in the list are dropped from the index.
+        :param files: list of absolute paths of all files that should be indexed
+        :param map_function: function used to apply scan_file to the files that have to be parsed,
+        e.g. to spread the work over a process pool
+        """
+        seen = set()
+        outdated = []
+        for file in files:
+            relative_path = os.path.relpath(file, self.src_dir)
+            seen.add(relative_path)
+            stat = os.stat(file)
+            entry = self.files.get(relative_path)
+            if entry is None or entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                outdated.append(file)
+
+        self.update(outdated, map_function)
+
+        for relative_path in set(self.files) - seen:
+            del self.files[relative_path]
+            self.changed = True
+
+    def update(self, files, map_function=map):
+        """
+        Parse the given files again, for example after they have been modified
+        :param files: list of absolute paths of the files
+        :param map_function: function used to apply scan_file to the files
+        """
+        for file, scan_result in zip(files, map_function(scan_file, files)):
+            self._store(file, scan_result)
+
+    def files_including(self, *headers):
+        """
+        Get all indexed files that include any of the given headers, no matter in which directory the header is
+        :param headers: header filenames, e.g. foo.h
+        :return: sorted list of absolute paths of the files including the headers
+        """
+        headers = set(headers)
+        files = []
+        for relative_path, entry in self.files.items():
+            if any(os.path.basename(include) in headers for include in entry['includes']):
+                files.append(os.path.join(self.src_dir, relative_path))
+        return sorted(files)
@@ -1,23 +1,117 @@
-import fileinput
+import argparse
+import itertools
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 
+from scripts.config import ProjectConfig
+from scripts.files import ENCODING, ERRORS, atomic_write, find_files, read_text
+from scripts.include import GuardRewriter, IncludeRewriter
+from scripts.index import INDEXED_EXTENSIONS, IncludeIndex
 from scripts.submanager import Submanager
+from scripts.sync import Sync
+from scripts.template import Templates
 from scripts.verbose import Verbose, MessageType
 
+# Number of files taken at a time by write_files
+WRITE_CHUNK_SIZE = 256
+# Names of modules, the same names as accepted on the command line
+NAME_REGEX = re.compile(r'[a-zA-Z0-9]+\Z')
+
+
+def jobs_count(value):
+    """
+    Argument type for the number of parallel jobs
+    :param value: argument value
+    :return: number of jobs as int
+    """
+    jobs = int(value)
+    if jobs < 1:
+        raise argparse.ArgumentTypeError("the number of jobs must be at least 1, not {}".format(jobs))
+    return jobs
+
+
+def update_includes(source_file, renames):
+    """
+    Rename modules included inside the source file
+    :param source_file: file to be scanned/updated
+    :param renames: tuple of (old name, new name) pairs
+    :return: true if the file contents have changed
+    """
+    with open(source_file, mode='rb') as source:
+        data = source.read()
+
+    # Read-only prescan: a file that does not contain any of the old names cannot include the modules.
+    # Such files are not rewritten, so they keep their modification time and do not trigger a rebuild.
+    if not any(old_name.encode(ENCODING) in data for old_name, _ in renames):
+        return False
+
+    # The whole file is rewritten in a single pass of the precompiled pattern
+    text, replacements = IncludeRewriter.for_renames(renames).rewrite(data.decode(ENCODING, ERRORS))
+    if replacements > 0:
+        atomic_write(source_file, text)
+    return replacements > 0
+
+
+def write_text(path, text):
+    """
+    Write the text into a new file
+    :param path: path of the file
+    :param text: contents of the file
+    """
+    with open(path, mode='w') as file:
+        file.write(text)
+
+
+def write_files(files, jobs=1, progress=None):
+    """
+    Write new files, by a pool of threads if jobs is more than 1. The files are taken from the iterable
+    a chunk at a time, so a generator producing them never has to keep all of them in memory.
+    :param files: iterable of (path, text) pairs
+    :param jobs: number of threads writing the files
+    :param progress: function called with the number of files written so far after every chunk, or None
+    :return: number of files written
+    """
+    executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    files = iter(files)
+    written = 0
+    try:
+        while True:
+            chunk = list(itertools.islice(files, WRITE_CHUNK_SIZE))
+            if not chunk:
+                return written
+            paths, texts = zip(*chunk)
+            # Consuming the results raises the first error of the writes, if any
+            list(executor.map(write_text, paths, texts) if executor is not None else map(write_text, paths, texts))
+            written += len(chunk)
+            if progress is not None:
+                progress(written)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
 
 class Module(Submanager):
-    def __init__(self, verbose_obj, name):
+    # Below this number of files the work is done in the current process,
+    # as starting the worker processes would take longer than the work itself
+    MIN_PARALLEL_FILES = 32
+
+    def __init__(self, verbose_obj, name, jobs=1, directory=None):
         """
         Create a Module object to manage (create/rename) a module.
         When creating a module, the name parameter should be set to the wanted name.
         However, when renaming, that parameter should be a name of an existing project that is to be renamed.
         :param verbose_obj: A Verbose object
         :param name: Target name when creating, or name of an existing module when renaming
+        :param jobs: Number of processes used to scan and update source files
+        :param directory: Directory the module is (or will be) in, the current working directory by default
         """
         super().__init__(verbose_obj)
-        self.working_dir = os.getcwd()
+        self.directory = os.path.abspath(directory) if directory is not None else os.getcwd()
+        self.working_dir = self.directory
         self.name = name
+        self.jobs = jobs
 
     @staticmethod
     def add_subparser(subparsers):
@@ -35,9 +129,16 @@ class Module(Submanager):
                                         metavar='old_name')
         mutually_exclusive.add_argument('-d', '--directory', action='store_true',
                                         help='create directory for the module')
-
+        mutually_exclusive.add_argument('-b', '--batch', action='store_true',
+                                        help='rename many modules at once, names are given as old_name=new_name')
+
+        parser.add_argument('-j', '--jobs', type=jobs_count, default=os.cpu_count() or 1,
+                            help='number of processes used to update the includes when renaming, or threads used '
+                                 'to write the files when creating many modules (default: number of CPU cores)')
+        parser.add_argument('--from', dest='names_file', type=argparse.FileType('r'), metavar='file',
+                            help='read names from the file (one per line), in addition to the ones given')
         parser.add_argument('-v', '--verbose', action='count')
-        parser.add_argument('name', help='target module name')
+        parser.add_argument('name', nargs='*', help='target module names (old_name=new_name pairs with --batch)')
         # Set a function that will be called to handle the arguments
         parser.set_defaults(function=Module.handle_args)
 
@@ -48,68 +149,203 @@ class Module(Submanager):
         :param args: Program arguments
         :param verbose: Verbose object
         """
+        if args.batch:
+            renames = [tuple(name.split('=')) for name in args.name]
+            for rename in renames:
+                # An empty name would refer to the working directory itself
+                if len(rename) != 2 or not all(rename):
+                    Verbose.print_any_level(MessageType.ERROR,
+                                            "{} is not in the form of old_name=new_name".format("=".join(rename)))
+                    return
+            Module.rename_many(verbose, renames, args.jobs)
+            return
+
+        if not args.rename and len(args.name) > 1:
+            Module.create_many(verbose, args.name, args.directory, args.jobs)
+            return
+
+        if len(args.name) != 1:
+            Verbose.print_any_level(MessageType.ERROR,
+                                    "expected exactly one module name, got {}".format(len(args.name)))
+            return
+
         # If args.rename option is present the existing name is actually args.rename and the new name is args.name
         # For example, if the program will be executed like this: cpm module -r foo bar
         # The existing name will be set to foo and args.name will be bar (the new name)
-        existing_name = args.name if not args.rename else args.rename
-        module = Module(verbose, existing_name)
+        name = args.name[0]
+        existing_name = name if not args.rename else args.rename
+        module = Module(verbose, existing_name, args.jobs)
 
         if args.rename:
-            module.rename(args.name)
+            module.rename(name)
         else:
             module.create_module(args.directory)
 
+    @staticmethod
+    def get_pch_include(directory=None):
+        """
+        Get the include directive of the precompiled header of the project. For the precompiled header to be used
+        it has to be included before anything else.
+        :param directory: Directory inside the project, the current working directory by default
+        :return: the include directive with a new line, or an empty string if the project does not use one
+        """
+        project_dir = Sync.find_project_dir(directory if directory is not None else os.getcwd())
+        pch = ProjectConfig(project_dir)['pch'] if project_dir is not None else None
+        return '#include "{}"\n'.format(pch) if pch is not None else ""
+
+    @staticmethod
+    def source_text(template, name, pch_include):
+        """
+        :param template: Template of the source file
+        :param name: name of the module
+        :param pch_include: include directive of the precompiled header, see get_pch_include
+        :return: contents of the source file of the module
+        """
+        return template.render({'NAME': name, 'PCH_INCLUDE': pch_include})
+
+    @staticmethod
+    def header_text(template, name):
+        """
+        :param template: Template of the header file
+        :param name: name of the module
+        :return: contents of the header file of the module, with the include-guard
+        """
+        return template.render({'NAME': name.upper()})
+
+    def get_templates(self):
+        """
+        :return: Templates of the project the module belongs to
+        """
+        return Templates.for_project(Sync.find_project_dir(self.directory))
+
     def create_source(self):
         """
         Create a source file with the header file included
         """
-        template_path = os.path.join(os.path.dirname(__file__), "../templates/module.c.txt")
         source_path = os.path.join(self.working_dir, self.name + ".c")
-
-        with open(template_path, mode='r') as template:
-            with open(source_path, mode='w') as source:
-                for line in template.readlines():
-                    line = line.replace("[NAME]", self.name)
-                    source.write(line)
+        pch_include = self.get_pch_include(self.directory)
+        write_text(source_path, self.source_text(self.get_templates().get("module.c.txt"), self.name, pch_include))
 
     def create_header(self):
         """
         Create a header file with an include-guard
         """
-        template_path = os.path.join(os.path.dirname(__file__), "../templates/module.h.txt")
         header_path = os.path.join(self.working_dir, self.name + ".h")
+        write_text(header_path, self.header_text(self.get_templates().get("module.h.txt"), self.name))
 
-        header_name = self.name.upper()
+    def creation_error(self):
+        """
+        Check if the module can be created
+        :return: error message, or None if the module can be created
+        """
+        if self.already_exists(self.name, self.directory):
+            return "Module with the name {0} already exists.".format(self.name)
+        return None
 
-        with open(template_path, mode='r') as template:
-            with open(header_path, mode='w') as header:
-                for line in template.readlines():
-                    line = line.replace("[NAME]", header_name)
-                    header.write(line)
+    def create_files(self, create_directory):
+        """
+        Create the source and header files (and the directory) of the module, without any checks
+        :param create_directory: If True a directory for the module will be created
+        :return: list of paths of the created files
+        """
+        if create_directory:
+            os.mkdir(os.path.join(self.directory, self.name))
+            self.working_dir = os.path.join(self.directory, self.name + '/')
+
+        self.create_source()
+        self.create_header()
+        return [os.path.join(self.working_dir, self.name + extension) for extension in ('.c', '.h')]
 
     def create_module(self, create_directory):
         """
         Create a module (source and header files), and a directory if create_directory is True
         :param create_directory: If True a directory for the module will be created
         """
-        if self.already_exists(self.name):
-            Verbose.print_any_level(MessageType.ERROR, "Module with the name {0} already exists.".format(self.name))
+        error = self.creation_error()
+        if error is not None:
+            Verbose.print_any_level(MessageType.ERROR, error)
             return
 
-        if create_directory:
-            os.mkdir(self.name)
-            self.working_dir = os.path.join(os.getcwd(), self.name + '/')
+        self.create_files(create_directory)
+        Sync.sync_if_in_project(self.verbose, self.directory)
 
-        self.create_source()
-        self.create_header()
+    @staticmethod
+    def existing_names(names, directory):
+        """
+        Find the names already used by a module, with a single listing of the directory
+        :param names: names of modules
+        :param directory: directory the modules would be created in
+        :return: set of the names for which a source, a header or a directory exists
+        """
+        entries = set(os.listdir(directory))
+        return {name for name in names if {name, name + '.c', name + '.h'} & entries}
+
+    @staticmethod
+    def create_many_files(names, create_directory, directory, jobs=1):
+        """
+        Create the source and header files (and the directories) of many modules, without any checks.
+        The project configuration is read once, and the files are written by a pool of threads.
+        :param names: names of the modules
+        :param create_directory: If True a directory for each module will be created
+        :param directory: directory to create the modules in
+        :param jobs: number of threads writing the files
+        :return: list of lists of paths of the created files, in the same order as the names
+        """
+        templates = Templates.for_project(Sync.find_project_dir(directory))
+        source_template = templates.get("module.c.txt")
+        header_template = templates.get("module.h.txt")
+        pch_include = Module.get_pch_include(directory)
+
+        created = []
+        files = []
+        for name in names:
+            module_dir = os.path.join(directory, name) if create_directory else directory
+            if create_directory:
+                os.mkdir(module_dir)
+            source_path, header_path = os.path.join(module_dir, name + '.c'), os.path.join(module_dir, name + '.h')
+            created.append([source_path, header_path])
+            files.append((source_path, Module.source_text(source_template, name, pch_include)))
+            files.append((header_path, Module.header_text(header_template, name)))
+
+        write_files(files, jobs if len(files) > 2 else 1)
+        return created
+
+    @staticmethod
+    def create_many(verbose, names, create_directory, jobs=1):
+        """
+        Create many modules at once. All names are checked before anything is created, and the project is synced
+        only once at the end.
+        :param verbose: Verbose object
+        :param names: names of the modules
+        :param create_directory: If True a directory for each module will be created
+        :param jobs: number of threads writing the files
+        """
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            Verbose.print_any_level(MessageType.ERROR,
+                                    "cannot create the modules. "
+                                    "The names {0} are given more than once.".format(", ".join(duplicates)))
+            return
+
+        directory = os.getcwd()
+        existing = Module.existing_names(names, directory)
+        for name in names:
+            if name in existing:
+                Verbose.print_any_level(MessageType.ERROR, "Module with the name {0} already exists.".format(name))
+        if existing:
+            return
+
+        Module.create_many_files(names, create_directory, directory, jobs)
+        verbose.print(MessageType.INFO, "Created {} modules".format(len(names)))
+        Sync.sync_if_in_project(verbose, directory)
 
     def rename_directory(self, new_name):
         """
         Rename directory to the new name
         :param new_name: New name
         """
-        old_dir = os.path.join(os.getcwd(), self.name)
-        new_dir = os.path.join(os.getcwd(), new_name)
+        old_dir = os.path.join(self.directory, self.name)
+        new_dir = os.path.join(self.directory, new_name)
         os.rename(old_dir, new_dir)
 
     def rename_in_include(self, line, new_name):
@@ -119,27 +355,7 @@ class Module(Submanager):
         :param new_name: new name to be substituted in
         :return: updated line and true/false depending if the line was modified
         """
-
-        """
-        There are two regular expressions and substitutions taking place.
-        The first one is responsible for renaming the directory (if it exists) of the module.
-        The regexp will capture everything to reuse after replacement
-        The first capture group is the #include "[../[directories]/]" part.
-        The second group captures the name of the module directory which contains the header file named [old_name].h
-        Finally, the last group captures the rest of the line (i.e. /[old_name].h" part)
-        """
-        dir_replaced = re.sub(r'(#include "[./a-zA-Z_\d]*)({0})(/{0}\.h*")'.format(self.name),
-                              r"\1%s\3" % new_name, line)
-
-        """
-        The second regex is responsible for renaming the actual header file.
-        Again, it has 3 capture groups where 1st and 3rd are there to keep the parts of the line that do not change.
-        It works pretty much the same as the first regex.
-        The 2nd captured group is the filename without extension which the name is replaced with the [new_name] 
-        """
-        line, replacements = re.subn(r'(#include "[./a-zA-Z]*)({0})(\.h*")'.format(self.name), r"\1%s\3" % new_name,
-                                     dir_replaced)
-
+        line, replacements = IncludeRewriter.for_rename(self.name, new_name).rewrite(line)
         return line, replacements > 0
 
     def rename_in_source(self, source_file, new_name):
@@ -149,16 +365,7 @@ class Module(Submanager):
         :param new_name: new name
         :return: true if the file contents have changed
         """
-        changed = False  # Indicates whether the file contents have changed or not
-        for line in fileinput.input(source_file, inplace=True):
-            renamed = self.rename_in_include(line, new_name)
-            # rename_in_include returns a tuple
-            # renamed[0] is the modified line
-            # renamed[1] is a boolean flag
-            print(renamed[0], end='')
-            if not changed and renamed[1]:
-                changed = True
-        return changed
+        return update_includes(source_file, ((self.name, new_name),))
 
     def rename_source(self, new_name):
         """
@@ -177,11 +384,8 @@ class Module(Submanager):
         :param new_name: new name
         :return: modified line
         """
-        old_name = self.name.upper()
-        new_name = new_name.upper()
-
         # Looks for [OLD_NAME]_H and substitutes it with [NEW_NAME]_H. Replacing will also affect the comments
-        return re.sub(r'([/*#a-zA-Z ]*)({0})(_H)([/*#a-zA-Z _]+)*'.format(old_name), r"\1%s\3\4" % new_name, line)
+        return GuardRewriter.for_rename(self.name, new_name).rewrite(line)[0]
 
     def rename_header_constants(self, file, new_name):
         """
@@ -189,8 +393,9 @@ class Module(Submanager):
         :param file: header file
         :param new_name: new name
         """
-        for line in fileinput.input(file, inplace=True):
-            print(self.rename_header_constant(line, new_name), end='')
+        text, replacements = GuardRewriter.for_rename(self.name, new_name).rewrite(read_text(file))
+        if replacements > 0:
+            atomic_write(file, text)
 
     def rename_header(self, new_name):
         """
@@ -206,88 +411,184 @@ class Module(Submanager):
     @staticmethod
     def get_all_source_files(src_dir):
         """
-        Get all .c files inside the given directory
+        Get all .c and .h files inside the given directory
         :param src_dir: directory with source files
-        :return: list of .c files inside the directory
+        :return: list of .c and .h files inside the directory
         """
-        files_list = []
-        for root, dirs, files in os.walk(src_dir):
-            for file in files:
-                if file.endswith('.c'):
-                    files_list.append(os.path.join(root, file))
-        return files_list
+        return find_files(src_dir, INDEXED_EXTENSIONS)
 
-    def update_usages(self, new_name):
+    def map_files(self, executor, function, files, *iterables):
         """
-        Look for the module include directive in every source file inside src directory (if such can be found in
-        the current working directory path
-        :param new_name: new name
+        Apply the function to every file, using the process pool of the executor if there are enough files
+        :param executor: ProcessPoolExecutor, or None to always run in the current process
+        :param function: function to apply, it must be picklable (i.e. a module-level function or a method)
+        :param files: list of files
+        :param iterables: other iterables with arguments passed to the function along with each file
+        :return: iterator over the results, in the same order as the files
         """
-        # Try to find src directory in the current working directory path
+        if executor is None or len(files) < self.MIN_PARALLEL_FILES:
+            return map(function, files, *iterables)
+
+        # Send the files in chunks, so the processes are not slowed down by communicating for every single file
+        chunksize = max(1, len(files) // (self.jobs * 4))
+        return executor.map(function, files, *iterables, chunksize=chunksize)
+
+    def update_usages(self, renames):
+        """
+        Look for the include directives of the renamed modules in every source file inside src directory (if such
+        can be found in the path of the module directory). Only the files that the include index reports
+        as including one of the module headers are opened, and each of them is rewritten at most once.
+        :param renames: dict mapping old module names to new module names
+        :return: list of paths of the updated files, relative to src
+        """
+        # Try to find src directory in the module directory path
         try:
-            src_dir = re.match(r'([\S\\ ]+src)', os.getcwd()).group(0)
+            src_dir = re.match(r'([\S\\ ]+src)', self.directory).group(0)
         except AttributeError:
             # src directory not found
             self.verbose.print(MessageType.WARNING, "src directory was not found in the current path. "
                                                     "Files that use the module will not be updated")
-            return
+            return []
+
+        renames = tuple(renames.items())
+        # Worker processes are only started once there is enough work submitted to the executor
+        executor = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        map_files = partial(self.map_files, executor)
+        try:
+            # Bring the include index up to date with all source and header files inside src and its subdirectories.
+            # Only new or modified files are parsed, the rest is taken from the index.
+            index = IncludeIndex(src_dir)
+            index.load()
+            index.refresh(self.get_all_source_files(src_dir), map_files)
+
+            # In each file that includes any of the modules, update the names
+            candidates = index.files_including(*(old_name + '.h' for old_name, _ in renames))
+            results = map_files(update_includes, candidates, [renames] * len(candidates))
+            files_updated = [file for file, changed in zip(candidates, results) if changed]
+
+            # Refresh the entries of the rewritten files before saving the index
+            index.update(files_updated, map_files)
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
-        # Get all source files inside src and its subdirectories
-        source_files = self.get_all_source_files(src_dir)
-        # In each file, look for the module usage and update the name if such usage exists
-        updated_count = 0  # Number of files that were updated
-        files_updated = []
-        for file in source_files:
-            if self.rename_in_source(file, new_name) is True:
-                updated_count += 1
-                files_updated.append(os.path.relpath(file, src_dir))
+        try:
+            index.save()
+        except OSError as error:
+            self.verbose.print(MessageType.WARNING, "could not save the include index: {}".format(error))
 
+        files_updated = [os.path.relpath(file, src_dir) for file in files_updated]
         if files_updated:
             self.verbose.print(MessageType.INFO,
                                "Updated {} files: {}".format(len(files_updated), ", ".join(files_updated)))
+        return files_updated
 
-    def rename(self, new_name):
+    def rename_error(self, new_name):
         """
-        Rename the module
+        Check if the module can be renamed
         :param new_name: new name
+        :return: error message, or None if the module exists and the new name is not used yet
         """
-        if not self.already_exists(self.name):
-            Verbose.print_any_level(MessageType.ERROR,
-                                    "cannot rename the module. "
-                                    "Module with the name {0} does not exist.".format(self.name))
-            return
+        if not self.already_exists(self.name, self.directory):
+            return "cannot rename the module. Module with the name {0} does not exist.".format(self.name)
 
-        if self.already_exists(new_name):
-            Verbose.print_any_level(MessageType.ERROR,
-                                    "cannot rename the module. "
-                                    "Module with the name {0} already exists.".format(new_name))
-            return
+        if self.already_exists(new_name, self.directory):
+            return "cannot rename the module. Module with the name {0} already exists.".format(new_name)
+
+        return None
+
+    def can_rename(self, new_name):
+        """
+        Check if the module can be renamed, print an error if it cannot
+        :param new_name: new name
+        :return: True if the module exists and the new name is not used yet
+        """
+        error = self.rename_error(new_name)
+        if error is not None:
+            Verbose.print_any_level(MessageType.ERROR, error)
+            return False
+        return True
 
+    def rename_files(self, new_name):
+        """
+        Rename the module directory (if the module has one), the source and the header files
+        :param new_name: new name
+        :return: list of paths of the renamed files (their new paths)
+        """
         # If the module is created inside a directory, rename it and go inside it
-        if self.directory_exists(self.name):
+        if self.directory_exists(self.name, self.directory):
             self.rename_directory(new_name)
             # Update the module directory
-            self.working_dir = os.path.join(self.working_dir, new_name)
+            self.working_dir = os.path.join(self.directory, new_name)
 
         # Rename source and header files
+        renamed = []
         if self.source_exists(self.working_dir, self.name):
             self.rename_source(new_name)
+            renamed.append(os.path.join(self.working_dir, new_name + '.c'))
         if self.header_exists(self.working_dir, self.name):
             self.rename_header(new_name)
+            renamed.append(os.path.join(self.working_dir, new_name + '.h'))
+        return renamed
 
+    def rename(self, new_name):
+        """
+        Rename the module
+        :param new_name: new name
+        """
+        if not self.can_rename(new_name):
+            return
+
+        self.rename_files(new_name)
         Verbose.print_any_level(MessageType.INFO, "Successfully renamed the module")
 
-        self.update_usages(new_name)
+        self.update_usages({self.name: new_name})
         self.name = new_name
+        Sync.sync_if_in_project(self.verbose, self.directory)
+
+    @staticmethod
+    def rename_many(verbose, renames, jobs=1):
+        """
+        Rename many modules at once. All renames are validated before anything is changed, then the modules
+        are renamed and the includes in all source files are updated in a single walk of the src directory.
+        :param verbose: Verbose object
+        :param renames: list of (old name, new name) pairs
+        :param jobs: Number of processes used to scan and update source files
+        """
+        old_names = [old_name for old_name, _ in renames]
+        new_names = [new_name for _, new_name in renames]
+        for names in (old_names, new_names):
+            duplicates = sorted({name for name in names if names.count(name) > 1})
+            if duplicates:
+                Verbose.print_any_level(MessageType.ERROR,
+                                        "cannot rename the modules. "
+                                        "The names {0} are given more than once.".format(", ".join(duplicates)))
+                return
+
+        modules = [(Module(verbose, old_name, jobs), new_name) for old_name, new_name in renames]
+        # Check every rename (so all errors are reported at once) before making any changes
+        if not all([module.can_rename(new_name) for module, new_name in modules]):
+            return
+
+        for module, new_name in modules:
+            module.rename_files(new_name)
+        Verbose.print_any_level(MessageType.INFO, "Successfully renamed {} modules".format(len(modules)))
+
+        if modules:
+            modules[0][0].update_usages(dict(renames))
+        for module, new_name in modules:
+            module.name = new_name
+        Sync.sync_if_in_project(verbose, os.getcwd())
 
     @staticmethod
-    def directory_exists(name):
+    def directory_exists(name, directory=None):
         """
-        Check if the directory with the given name exists in the current working directory
+        Check if the directory with the given name exists in the given directory
         :param name: Directory name
+        :param directory: Directory to check, the current working directory by default
         :return: True if it exists
         """
-        dir_path = os.path.join(os.getcwd(), name)
+        dir_path = os.path.join(directory if directory is not None else os.getcwd(), name)
         return os.path.exists(dir_path)
 
     @staticmethod
@@ -311,15 +612,17 @@ class Module(Submanager):
         return os.path.exists(os.path.join(directory, name + '.h'))
 
     @staticmethod
-    def already_exists(name):
+    def already_exists(name, directory=None):
         """
         Check if the module already exists
         :param name: name of a module
+        :param directory: Directory to check, the current working directory by default
         :return: True if either source, header or directory with the given name exists
         """
+        if directory is None:
+            directory = os.getcwd()
 
-        if Module.directory_exists(name):
+        if Module.directory_exists(name, directory):
             return True
 
-        directory = os.getcwd()
         return Module.header_exists(directory, name) or Module.source_exists(directory, name)
@@ -1,22 +1,75 @@
+import argparse
 import errno
 import fileinput
 import os
-from shutil import copyfile
+import re
+import time
 
-from submanager import Submanager
-from verbose import *
+from scripts.config import ProjectConfig
+from scripts.generators import GENERATORS, Generator, MakeGenerator
+from scripts.module import Module, jobs_count, write_files
+from scripts.spec import ProjectSpec, SpecError
+from scripts.submanager import Submanager
+from scripts.sync import Sync
+from scripts.template import Templates
+from scripts.verbose import *
+
+
+def pch_header(value):
+    """
+    Argument type for the precompiled header
+    :param value: path of the header relative to the src directory
+    :return: normalised path
+    """
+    path = os.path.normpath(value)
+    if not path.endswith('.h') or os.path.isabs(path) or path.startswith('..'):
+        raise argparse.ArgumentTypeError("{} is not a header inside the src directory".format(value))
+    return path
+
+
+def unity_batches(value):
+    """
+    Argument type for the number of unity build batches
+    :param value: number of batches as str
+    :return: number of batches, 0 to disable unity builds
+    """
+    try:
+        batches = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("{} is not a number".format(value))
+    if batches < 0:
+        raise argparse.ArgumentTypeError("the number of batches cannot be negative")
+    return batches
 
 
 class Project(Submanager):
-    def __init__(self, verbose_obj, name):
+    def __init__(self, verbose_obj, name, generator=MakeGenerator.NAME, profile=None):
         super().__init__(verbose_obj)
         self.name = name
         self.directory = os.path.join(os.getcwd(), self.name)
+        self.generator = generator
+        self.profile = profile
 
     @staticmethod
     def add_subparser(subparsers):
         parser = subparsers.add_parser('project', help='creates/renames project')
         parser.add_argument('-r', '--rename', help='rename project with [old_name] to [name]', metavar='old_name')
+        parser.add_argument('-g', '--generator', choices=sorted(GENERATORS),
+                            help='build system to generate the build files for (default: make)')
+        parser.add_argument('-p', '--profile', choices=MakeGenerator.PROFILES,
+                            help='default build profile of the makefile (default: {}), '
+                                 'others can be built with make PROFILE=name'.format(MakeGenerator.DEFAULT_PROFILE))
+        parser.add_argument('--pch', type=pch_header, metavar='header',
+                            help='precompile the header (relative to src, created if it does not exist) and include '
+                                 'it first in new modules. Can be used with an existing project to enable it')
+        parser.add_argument('--unity', type=unity_batches, metavar='batches',
+                            help='generate a unity build (make UNITY=1 or ninja unity) compiling the sources in '
+                                 'the given number of batches, 0 to disable it. Can be used with an existing project')
+        parser.add_argument('--spec', metavar='file',
+                            help='create the directories and modules described in the JSON or YAML file '
+                                 'in the new project')
+        parser.add_argument('-j', '--jobs', type=jobs_count, default=os.cpu_count() or 1,
+                            help='number of threads writing the files of the spec (default: number of CPU cores)')
         parser.add_argument('-v', '--verbose', action='count')
         parser.add_argument("name", help="target project name")
         # Set a function that will be called to handle the arguments
@@ -24,13 +77,58 @@ class Project(Submanager):
 
     @staticmethod
     def handle_args(args, verbose):
+        spec = None
+        if args.spec is not None:
+            if args.rename:
+                Verbose.print_any_level(MessageType.ERROR, "--spec cannot be used when renaming a project")
+                return
+            try:
+                spec = ProjectSpec.load(args.spec)
+                Project.apply_spec_settings(args, spec)
+            except SpecError as error:
+                Verbose.print_any_level(MessageType.ERROR, error)
+                return
+        if args.generator is None:
+            args.generator = MakeGenerator.NAME
+
         existing_name = args.name if not args.rename else args.rename
-        project = Project(verbose, existing_name)
+        if args.profile is not None and args.profile not in GENERATORS[args.generator].PROFILES:
+            Verbose.print_any_level(MessageType.ERROR, "build profiles are not supported by {}".format(args.generator))
+            return
+        project = Project(verbose, existing_name, args.generator, args.profile)
 
         if args.rename:
             project.rename(args.name)
+        elif spec is not None:
+            project.create_from_spec(spec, args.pch, args.unity, args.jobs)
+        elif (args.pch is not None or args.unity is not None) and os.path.isdir(project.directory):
+            if args.unity is not None:
+                project.set_unity(args.unity)
+            if args.pch is not None:
+                project.set_pch(args.pch)
         else:
-            project.create_project()
+            project.create_project(args.pch, args.unity)
+
+    @staticmethod
+    def apply_spec_settings(args, spec):
+        """
+        Use the settings of the spec (generator, profile etc.) which are not given on the command line
+        :param args: Program arguments
+        :param spec: ProjectSpec
+        """
+        for setting, argument_type in (('generator', str), ('profile', str), ('pch', pch_header),
+                                       ('unity', unity_batches)):
+            if getattr(args, setting) is not None or setting not in spec.settings:
+                continue
+            try:
+                setattr(args, setting, argument_type(str(spec.settings[setting])))
+            except argparse.ArgumentTypeError as error:
+                raise SpecError("{} in the spec: {}".format(setting, error))
+
+        if args.generator is not None and args.generator not in GENERATORS:
+            raise SpecError("unknown generator in the spec: {}".format(args.generator))
+        if args.profile is not None and args.profile not in MakeGenerator.PROFILES:
+            raise SpecError("unknown profile in the spec: {}".format(args.profile))
 
     def create_folders(self):
         """
@@ -58,30 +156,103 @@ class Project(Submanager):
         """
         Create the main.c file
         """
-        template = os.path.join(os.path.dirname(__file__), "../templates/main.c.txt")
         main_file = os.path.join(self.directory, "src/main.c")
-        copyfile(template, main_file)
+        with open(main_file, mode='w') as main:
+            main.write(Templates.for_project(self.directory).render("main.c.txt", {'PROJECT_NAME': self.name}))
 
-    def create_makefile(self):
+    def create_project(self, pch=None, unity=None):
         """
-        Create the makefile
+        Create project folders (main folder with src and build in it), main.c and the build files
+        (e.g. the makefile and sources.mk)
+        :param pch: precompiled header relative to the src directory, or None to not use one
+        :param unity: number of unity build batches, or None to not generate a unity build
+        :return: True if the project was created
         """
-        template_path = os.path.join(os.path.dirname(__file__), "../templates/makefile.txt")
-        makefile_path = os.path.join(self.directory, "makefile")
+        if not self.create_folders():
+            return False
 
-        with open(template_path, mode='r') as template:
-            with open(makefile_path, mode='w') as makefile:
-                for line in template.readlines():
-                    line = line.replace("[PROJECT_NAME]", self.name)
-                    makefile.write(line)
+        self.create_main_file()
+        GENERATORS[self.generator](self.directory).create(self.name, self.profile)
+        if unity is not None:
+            config = ProjectConfig(self.directory)
+            config['unity'] = unity
+            config.save()
+        if pch is not None:
+            self.set_pch(pch)
+        else:
+            Sync(self.verbose, self.directory).sync()
+        return True
 
-    def create_project(self):
+    def create_from_spec(self, spec, pch=None, unity=None, jobs=1):
         """
-        Create project folders (main folder with src and build in it), main.c and the makefile
+        Create the project, then the directories and modules described by the spec. The files of the modules
+        are generated one module at a time and written by a pool of threads, and the project is synced once
+        at the end.
+        :param spec: ProjectSpec
+        :param pch: precompiled header relative to the src directory, or None to not use one
+        :param unity: number of unity build batches, or None to not generate a unity build
+        :param jobs: number of threads writing the files
         """
-        if self.create_folders():
-            self.create_main_file()
-            self.create_makefile()
+        if pch is not None and pch in spec.headers.values():
+            Verbose.print_any_level(MessageType.ERROR, "the precompiled header {} is a header of a module in the spec"
+                                    .format(pch))
+            return
+
+        start = time.perf_counter()
+        if not self.create_project(pch, unity):
+            return
+
+        src_dir = os.path.join(self.directory, "src")
+        spec.create_directories(src_dir)
+        files_count = 2 * len(spec.modules)
+        files = spec.files(src_dir, Templates.for_project(self.directory), Module.get_pch_include(self.directory))
+        write_files(files, jobs, lambda written: self.verbose.print(MessageType.INFO, "Written {}/{} files"
+                                                                    .format(written, files_count)))
+        Sync(self.verbose, self.directory).sync()
+        Verbose.print_any_level(MessageType.INFO, "Created {} modules in {} directories ({} files) in {:.2f} s"
+                                .format(len(spec.modules), len(spec.directories), files_count,
+                                        time.perf_counter() - start))
+
+    def set_pch(self, header):
+        """
+        Set the precompiled header of the project. The header is created if it does not exist yet.
+        The build files are updated to precompile it, and new modules will include it first.
+        :param header: header relative to the src directory
+        """
+        if Generator.detect(self.directory) is None:
+            Verbose.print_any_level(MessageType.ERROR, "{} is not a project".format(self.name))
+            return
+
+        header_path = os.path.join(self.directory, "src", header)
+        if not os.path.exists(header_path):
+            os.makedirs(os.path.dirname(header_path), exist_ok=True)
+            module = Module(self.verbose, os.path.splitext(os.path.basename(header))[0])
+            module.working_dir = os.path.dirname(header_path)
+            module.create_header()
+
+        config = ProjectConfig(self.directory)
+        config['pch'] = header
+        config.save()
+        Sync(self.verbose, self.directory).sync()
+        self.verbose.print(MessageType.INFO, "{} will be precompiled. Include it before anything else in the source "
+                                             "files to use it.".format(header))
+
+    def set_unity(self, batches):
+        """
+        Set the number of batches of the unity build. The unity build sources (in .cpm/unity) and the build files
+        are updated right away, and on every sync after that.
+        :param batches: number of batches, 0 to disable the unity build
+        """
+        if Generator.detect(self.directory) is None:
+            Verbose.print_any_level(MessageType.ERROR, "{} is not a project".format(self.name))
+            return
+
+        config = ProjectConfig(self.directory)
+        config['unity'] = batches
+        config.save()
+        Sync(self.verbose, self.directory).sync()
+        if batches:
+            self.verbose.print(MessageType.INFO, "The unity build compiles the sources in {} batches".format(batches))
 
     def rename(self, new_name):
         """
@@ -93,7 +264,14 @@ class Project(Submanager):
             return
 
         os.rename(self.name, new_name)
-        makefile_path = (os.path.join(os.getcwd(), new_name, "makefile"))
-        for line in fileinput.input(makefile_path, inplace=True):
+        generator = Generator.detect(new_name)
+        build_file_path = (os.path.join(os.getcwd(), new_name, generator.BUILD_FILE))
+        # The templates use the name only as the last part of the program's path (e.g. $(OBJ)/[PROJECT_NAME]),
+        # anything else with the same text (cpm commands, profile names etc.) is left as it is
+        name_regex = re.compile(r'(?<=/){}(?![A-Za-z0-9_.-])'.format(re.escape(self.name)))
+        for line in fileinput.input(build_file_path, inplace=True):
             # Change the end to an empty string, otherwise it will put another \n
-            print(line.replace(self.name, new_name), end='')
+            print(name_regex.sub(new_name, line), end='')
+
+        # The generated files (e.g. compile_commands.json) contain the path of the project directory
+        Sync(self.verbose, os.path.join(os.getcwd(), new_name)).sync()
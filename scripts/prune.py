@@ -0,0 +1,136 @@
+import os
+
+from scripts.deps import IncludeGraph
+from scripts.module import Module
+from scripts.submanager import Submanager
+from scripts.sync import Sync
+from scripts.verbose import Verbose, MessageType
+
+
+class Prune(Submanager):
+    """
+    Finds (and removes) the modules nothing uses any more
+    """
+
+    def __init__(self, verbose_obj, project_dir):
+        """
+        :param verbose_obj: Verbose object
+        :param project_dir: project directory
+        """
+        super().__init__(verbose_obj)
+        self.project_dir = project_dir
+        self.src_dir = os.path.join(project_dir, "src")
+
+    @staticmethod
+    def add_subparser(subparsers):
+        """
+        Set up the prune option and all its arguments
+        :param subparsers: subparsers of the argument parser
+        """
+        parser = subparsers.add_parser('prune', help='lists the modules whose header is not included anywhere '
+                                                     'outside the module')
+        parser.add_argument('--apply', action='store_true', help='remove the modules')
+        parser.add_argument('-v', '--verbose', action='count')
+        # Set a function that will be called to handle the arguments
+        parser.set_defaults(function=Prune.handle_args)
+
+    @staticmethod
+    def handle_args(args, verbose):
+        """
+        Handle the program arguments
+        :param args: Program arguments
+        :param verbose: Verbose object
+        """
+        project_dir = Sync.find_project_dir(os.getcwd())
+        if project_dir is None:
+            Verbose.print_any_level(MessageType.ERROR, "no project found in the current directory or its parents")
+            return
+
+        Prune(verbose, project_dir).prune(args.apply)
+
+    @staticmethod
+    def module_files(graph, header):
+        """
+        Get the files of the module the header belongs to. These are exactly the files remove deletes, so any other
+        file including the header (even inside the module directory) is a use of the module.
+        :param graph: IncludeGraph
+        :param header: path of the header relative to src
+        :return: set of the source and the header of the module, or None if the header is not a part of a module
+        """
+        directory, filename = os.path.split(header)
+        source = os.path.join(directory, os.path.splitext(filename)[0] + '.c')
+        if source not in graph.edges:
+            return None
+        return {header, source}
+
+    @staticmethod
+    def find_unused(graph):
+        """
+        Find the modules whose header is not included by any file outside the module. A module that is used only
+        by unused modules is unused as well.
+        :param graph: IncludeGraph
+        :return: sorted list of the headers of the unused modules
+        """
+        includers = {file: set() for file in graph.edges}
+        for file, included_files in graph.edges.items():
+            for included in included_files:
+                includers[included].add(file)
+
+        modules = {}
+        for header in graph.headers():
+            files = Prune.module_files(graph, header)
+            if files is not None:
+                modules[header] = files
+
+        unused = set()
+        removed_files = set()
+        changed = True
+        while changed:
+            changed = False
+            for header, files in modules.items():
+                if header not in unused and not includers[header] - files - removed_files:
+                    unused.add(header)
+                    removed_files |= files
+                    changed = True
+        return sorted(unused)
+
+    def remove(self, header):
+        """
+        Remove the source and the header of the module, and its directory if nothing else is left in it
+        :param header: path of the header relative to src
+        :return: list of the removed files, relative to src
+        """
+        directory, filename = os.path.split(os.path.join(self.src_dir, header))
+        name = os.path.splitext(filename)[0]
+        removed = []
+        for exists, extension in ((Module.source_exists, '.c'), (Module.header_exists, '.h')):
+            if exists(directory, name):
+                os.remove(os.path.join(directory, name + extension))
+                removed.append(os.path.relpath(os.path.join(directory, name + extension), self.src_dir))
+
+        if os.path.basename(directory) == name and not os.listdir(directory):
+            os.rmdir(directory)
+        return removed
+
+    def prune(self, apply=False):
+        """
+        Print the unused modules, and remove them if apply is True
+        :param apply: remove the modules
+        """
+        unused = self.find_unused(IncludeGraph.from_index(self.src_dir))
+        if not unused:
+            Verbose.print_any_level(MessageType.INFO, "No unused modules found")
+            return
+
+        if not apply:
+            Verbose.print_any_level(MessageType.INFO, "{} unused modules (remove them with --apply):"
+                                    .format(len(unused)))
+            for header in unused:
+                Verbose.print_any_level(MessageType.INFO, "    " + os.path.splitext(header)[0])
+            return
+
+        for header in unused:
+            removed = self.remove(header)
+            Verbose.print_any_level(MessageType.INFO, "Removed {} ({})"
+                                    .format(os.path.splitext(header)[0], ", ".join(removed)))
+        Sync(self.verbose, self.project_dir).sync()
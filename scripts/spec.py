@@ -0,0 +1,204 @@
+import json
+import os
+from collections import namedtuple
+
+from scripts.files import read_text
+from scripts.module import NAME_REGEX, Module
+
+# directory: directory of the module relative to src ("" for src itself)
+# name: name of the module
+# own_directory: True if the module has its own directory (like cpm module -d)
+# includes: keys of the modules the source of the module includes, see ProjectSpec.key
+SpecModule = namedtuple('SpecModule', ['directory', 'name', 'own_directory', 'includes'])
+
+
+class SpecError(Exception):
+    """
+    The spec file cannot be read, or it does not describe a valid project
+    """
+
+
+class ProjectSpec:
+    """
+    Declarative description of a project: the directories inside src, the modules in them and the modules each
+    module includes. Modules and directories are given by their name, or as a name with {} and a count to get many
+    of them at once (e.g. worker{} with count 3 gives worker1, worker2 and worker3).
+    """
+    # Settings that can be given on the command line as well, the command line takes precedence
+    SETTINGS = ('generator', 'profile', 'pch', 'unity')
+    MODULE_KEYS = ('name', 'count', 'directory', 'includes')
+    DIRECTORY_KEYS = ('name', 'count', 'modules', 'directories')
+
+    def __init__(self, data):
+        """
+        :param data: the spec as parsed from JSON or YAML
+        """
+        if not isinstance(data, dict):
+            raise SpecError("the spec must be a mapping")
+        self.check_keys(data, self.SETTINGS + ('modules', 'directories'), "the spec")
+
+        self.settings = {key: data[key] for key in self.SETTINGS if key in data}
+        self.directories = []  # Directories relative to src, parents before their subdirectories
+        self.modules = []  # SpecModule for every module
+        self.headers = {}  # Paths of the headers relative to src, by the keys of the modules
+        self.read_directory(data, "")
+        if "main" in self.headers:
+            raise SpecError("the module main would replace main.c")
+
+        for module in self.modules:
+            for include in module.includes:
+                if include not in self.headers:
+                    raise SpecError("module {} includes {}, which is not in the spec"
+                                    .format(self.key(module.directory, module.name), include))
+
+    @staticmethod
+    def load(path):
+        """
+        Read the spec from a JSON or a YAML (.yaml or .yml) file. YAML needs the PyYAML package.
+        :param path: path of the spec file
+        :return: ProjectSpec
+        """
+        try:
+            text = read_text(path)
+        except OSError as error:
+            raise SpecError("cannot read {}: {}".format(path, error.strerror))
+
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise SpecError("reading YAML specs requires PyYAML (pip install pyyaml), or use a JSON spec")
+            try:
+                data = yaml.safe_load(text)
+            except yaml.YAMLError as error:
+                raise SpecError("{} is not valid YAML: {}".format(path, error))
+        else:
+            try:
+                data = json.loads(text)
+            except ValueError as error:
+                raise SpecError("{} is not valid JSON: {}".format(path, error))
+        return ProjectSpec(data)
+
+    @staticmethod
+    def key(directory, name):
+        """
+        :param directory: directory of the module relative to src
+        :param name: name of the module
+        :return: the key the module is referred to by in includes, e.g. net/socket
+        """
+        return directory + "/" + name if directory else name
+
+    @staticmethod
+    def check_keys(entry, keys, description):
+        """
+        Make sure the entry does not contain anything unknown (e.g. a misspelled key)
+        :param entry: dict from the spec
+        :param keys: allowed keys
+        :param description: what the entry describes, for the error message
+        """
+        unknown = sorted(str(key) for key in entry if key not in keys)
+        if unknown:
+            raise SpecError("unknown keys in {}: {}".format(description, ", ".join(unknown)))
+
+    @staticmethod
+    def names(entry, keys, description):
+        """
+        Get the names an entry of the modules or directories list stands for
+        :param entry: name, or dict with the name and other keys
+        :param keys: allowed keys of the dict
+        :param description: what the entry describes, for the error messages
+        :return: tuple of the list of names and the dict
+        """
+        if not isinstance(entry, dict):
+            entry = {'name': entry}
+        ProjectSpec.check_keys(entry, keys, description)
+
+        name = str(entry.get('name', ""))
+        count = entry.get('count')
+        if count is None:
+            names = [name]
+        elif isinstance(count, int) and not isinstance(count, bool) and count >= 0 and "{}" in name:
+            names = [name.replace("{}", str(i)) for i in range(1, count + 1)]
+        else:
+            raise SpecError("{} {}: the count must be a non-negative number and the name must contain {{}}"
+                            .format(description, name))
+
+        for name in names:
+            if not NAME_REGEX.match(name):
+                raise SpecError("{} name {} can only contain letters and numbers".format(description, name))
+        return names, entry
+
+    def add_directory(self, path):
+        """
+        :param path: directory relative to src
+        """
+        if path in self.directories:
+            raise SpecError("directory {} is given more than once".format(path))
+        self.directories.append(path)
+
+    def read_directory(self, entry, directory):
+        """
+        Read the modules and the subdirectories of the directory
+        :param entry: dict describing the directory
+        :param directory: the directory relative to src
+        """
+        for module_entry in self.as_list(entry.get('modules'), 'modules', directory):
+            names, module_entry = self.names(module_entry, self.MODULE_KEYS, "module")
+            includes = [str(include) for include in self.as_list(module_entry.get('includes'), 'includes', directory)]
+            own_directory = bool(module_entry.get('directory', False))
+            for name in names:
+                key = self.key(directory, name)
+                if key in self.headers:
+                    raise SpecError("module {} is given more than once".format(key))
+                if own_directory:
+                    self.add_directory(key)
+                self.headers[key] = os.path.join(key, name + '.h') if own_directory else key + '.h'
+                self.modules.append(SpecModule(directory, name, own_directory, includes))
+
+        for directory_entry in self.as_list(entry.get('directories'), 'directories', directory):
+            names, directory_entry = self.names(directory_entry, self.DIRECTORY_KEYS, "directory")
+            for name in names:
+                path = self.key(directory, name)
+                self.add_directory(path)
+                self.read_directory(directory_entry, path)
+
+    @staticmethod
+    def as_list(value, description, directory):
+        """
+        :param value: value from the spec that should be a list (or missing)
+        :param description: what the list contains, for the error message
+        :param directory: directory the list belongs to, for the error message
+        :return: the list
+        """
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            raise SpecError("{} of {} must be a list".format(description, directory or "src"))
+        return value
+
+    def create_directories(self, src_dir):
+        """
+        :param src_dir: src directory of the project
+        """
+        for directory in self.directories:
+            os.makedirs(os.path.join(src_dir, directory), exist_ok=True)
+
+    def files(self, src_dir, templates, pch_include):
+        """
+        Generate the source and header files of the modules one module at a time. The sources include their headers
+        (as the module template does), followed by the headers of the modules given in includes.
+        :param src_dir: src directory of the project
+        :param templates: Templates used to render the files
+        :param pch_include: include directive of the precompiled header, see Module.get_pch_include
+        :return: iterator over (path, text) pairs
+        """
+        source_template = templates.get("module.c.txt")
+        header_template = templates.get("module.h.txt")
+        for module in self.modules:
+            module_dir = os.path.join(module.directory, module.name) if module.own_directory else module.directory
+            source = Module.source_text(source_template, module.name, pch_include)
+            source += "".join('#include "{}"\n'.format(os.path.relpath(self.headers[include], module_dir or "."))
+                              for include in module.includes)
+            yield os.path.join(src_dir, module_dir, module.name + '.c'), source
+            yield os.path.join(src_dir, module_dir, module.name + '.h'), Module.header_text(header_template,
+                                                                                          module.name)
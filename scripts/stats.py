@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from scripts.cache import CompileCommand, format_size
+from scripts.config import CPM_DIRECTORY
+from scripts.files import atomic_write
+from scripts.submanager import Submanager
+from scripts.sync import Sync
+from scripts.verbose import Verbose, MessageType
+
+
+class CompileTimes:
+    """
+    Wall time and peak memory usage of compiling each translation unit. The compiler launcher (make TIME_REPORT=1)
+    appends a record for every compiled source to RECORDS_FILE. When the report is printed, the records are moved
+    into HISTORY_FILE as one run, so every run can be compared with the previous ones.
+    """
+    RECORDS_FILE = "compile_times.jsonl"
+    HISTORY_FILE = "compile_history.json"
+    MAX_RUNS = 20
+    # Differences smaller than this (in seconds) are noise, not regressions
+    MIN_REGRESSION = 0.05
+
+    def __init__(self, project_dir):
+        """
+        :param project_dir: project directory
+        """
+        self.records_path = os.path.join(project_dir, CPM_DIRECTORY, self.RECORDS_FILE)
+        self.history_path = os.path.join(project_dir, CPM_DIRECTORY, self.HISTORY_FILE)
+
+    def record(self, args):
+        """
+        Run the compile command and record how long it took and how much memory the compiler needed
+        :param args: compile command line
+        :return: exit code of the compiler
+        """
+        command = CompileCommand(args)
+        start = time.perf_counter()
+        returncode = subprocess.run(args).returncode
+        elapsed = time.perf_counter() - start
+        if returncode != 0 or len(command.sources) != 1:
+            return returncode
+
+        # The peak of the largest process waited for, i.e. the compiler proper (in kilobytes on Linux)
+        rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+        line = json.dumps({'source': os.path.normpath(command.sources[0]), 'time': round(elapsed, 4), 'rss': rss})
+        os.makedirs(os.path.dirname(self.records_path), exist_ok=True)
+        # A single write to a file opened for appending is not interleaved with the records of other compilations
+        # running at the same time (make -j)
+        fd = os.open(self.records_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+        try:
+            os.write(fd, (line + "\n").encode())
+        finally:
+            os.close(fd)
+        return returncode
+
+    def clear_records(self):
+        """
+        Forget the records not moved into the history yet, so the next run starts from scratch
+        """
+        try:
+            os.remove(self.records_path)
+        except FileNotFoundError:
+            pass
+
+    def read_history(self):
+        """
+        :return: list of runs, the latest last. Each run is a dict with the time it was finished and the units,
+                 a dict mapping the sources to dicts with their compile time and peak memory usage.
+        """
+        try:
+            with open(self.history_path, mode='r') as history_file:
+                return json.load(history_file)
+        except (OSError, ValueError):
+            return []
+
+    def finish_run(self):
+        """
+        Move the records into the history as a new run
+        :return: the new run, or None if there were no records
+        """
+        units = {}
+        try:
+            with open(self.records_path, mode='r') as records_file:
+                for line in records_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    units[record['source']] = {'time': record['time'], 'rss': record['rss']}
+        except FileNotFoundError:
+            pass
+        if not units:
+            return None
+
+        run = {'finished': time.time(), 'units': units}
+        history = (self.read_history() + [run])[-self.MAX_RUNS:]
+        atomic_write(self.history_path, json.dumps(history, indent=1, sort_keys=True) + "\n")
+        self.clear_records()
+        return run
+
+    @staticmethod
+    def slowest(run, count):
+        """
+        :param run: run from the history
+        :param count: maximum number of units
+        :return: list of (source, unit) of the slowest units of the run, the slowest first
+        """
+        return sorted(run['units'].items(), key=lambda item: (-item[1]['time'], item[0]))[:count]
+
+    @staticmethod
+    def regressions(history, threshold):
+        """
+        Compare the last run with the previous ones. Incremental builds compile only some of the units, so each unit
+        is compared with the last run it was compiled in.
+        :param history: list of runs, the latest last
+        :param threshold: minimum slowdown in percent
+        :return: list of (source, previous time, time) of the units that got slower, the largest slowdown first
+        """
+        if not history:
+            return []
+
+        regressions = []
+        for source, unit in history[-1]['units'].items():
+            previous = next((run['units'][source] for run in reversed(history[:-1]) if source in run['units']), None)
+            if previous is None:
+                continue
+            if (unit['time'] > previous['time'] * (1 + threshold / 100)
+                    and unit['time'] - previous['time'] >= CompileTimes.MIN_REGRESSION):
+                regressions.append((source, previous['time'], unit['time']))
+        return sorted(regressions, key=lambda regression: (regression[1] - regression[2], regression[0]))
+
+
+class Stats(Submanager):
+    """
+    Reports which translation units take the longest to compile
+    """
+
+    def __init__(self, verbose_obj, project_dir):
+        """
+        :param verbose_obj: Verbose object
+        :param project_dir: project directory
+        """
+        super().__init__(verbose_obj)
+        self.project_dir = project_dir
+        self.compile_times = CompileTimes(project_dir)
+
+    @staticmethod
+    def add_subparser(subparsers):
+        """
+        Set up the stats option and all its arguments
+        :param subparsers: subparsers of the argument parser
+        """
+        parser = subparsers.add_parser('stats', help='prints the slowest translation units of the last build '
+                                                     'with the time report and the compile time regressions')
+        parser.add_argument('-n', '--count', type=int, default=10, help='number of the slowest units to print '
+                                                                         '(default: 10)')
+        parser.add_argument('--threshold', type=float, default=10, metavar='percent',
+                            help='minimum slowdown reported as a regression (default: 10)')
+        parser.add_argument('-v', '--verbose', action='count')
+        actions = parser.add_subparsers(dest='action', metavar='action')
+        record = actions.add_parser('record', help='run a compile command and record its time and memory usage '
+                                                   '(used by the build files)')
+        record.add_argument('command', nargs=argparse.REMAINDER, help='compile command, e.g. -- gcc -c ...')
+
+        # Set a function that will be called to handle the arguments
+        parser.set_defaults(function=Stats.handle_args)
+
+    @staticmethod
+    def handle_args(args, verbose):
+        """
+        Handle the program arguments
+        :param args: Program arguments
+        :param verbose: Verbose object
+        """
+        project_dir = Sync.find_project_dir(os.getcwd())
+        if args.action == 'record':
+            command = args.command[1:] if args.command[:1] == ['--'] else args.command
+            if not command:
+                Verbose.print_any_level(MessageType.ERROR, "no compile command given")
+                sys.exit(2)
+            if project_dir is None:
+                # Nowhere to record it, the build must not fail because of that though
+                sys.exit(subprocess.run(command).returncode)
+            sys.exit(CompileTimes(project_dir).record(command))
+
+        if project_dir is None:
+            Verbose.print_any_level(MessageType.ERROR, "no project found in the current directory or its parents")
+            return
+        Stats(verbose, project_dir).print_report(args.count, args.threshold)
+
+    def print_report(self, count=10, threshold=10):
+        """
+        Print the slowest units of the last run and the regressions compared with the previous runs.
+        The records of the build that has just finished become the last run.
+        :param count: number of the slowest units to print
+        :param threshold: minimum slowdown in percent reported as a regression
+        """
+        self.compile_times.finish_run()
+        history = self.compile_times.read_history()
+        if not history:
+            Verbose.print_any_level(MessageType.INFO, "No compile times recorded yet, build the project with "
+                                                      "cpm build --time-report or make TIME_REPORT=1")
+            return
+
+        run = history[-1]
+        Verbose.print_any_level(MessageType.INFO, "Slowest of the {} translation units compiled in the last run:"
+                                .format(len(run['units'])))
+        for source, unit in CompileTimes.slowest(run, count):
+            Verbose.print_any_level(MessageType.INFO, "{:8.2f} s {:>10}  {}"
+                                    .format(unit['time'], format_size(unit['rss']), source))
+
+        if len(history) < 2:
+            return
+        regressions = CompileTimes.regressions(history, threshold)
+        if not regressions:
+            Verbose.print_any_level(MessageType.INFO, "No regressions compared with the previous runs")
+            return
+        Verbose.print_any_level(MessageType.WARNING, "Regressions compared with the previous runs:")
+        for source, previous, current in regressions:
+            Verbose.print_any_level(MessageType.INFO, "{:8.2f} s -> {:.2f} s (+{:.0f}%)  {}"
+                                    .format(previous, current, 100 * (current - previous) / previous, source))
@@ -0,0 +1,98 @@
+import os
+
+from scripts.files import find_files
+from scripts.generators import COMPILE_COMMANDS_FILE, BuildFilesError, Generator
+from scripts.submanager import Submanager
+from scripts.verbose import Verbose, MessageType
+
+
+class Sync(Submanager):
+    """
+    Generates the list of source files of a project for the build system, so it does not have to search
+    the source tree on every build.
+    """
+
+    def __init__(self, verbose_obj, project_dir):
+        """
+        :param verbose_obj: Verbose object
+        :param project_dir: project directory (the one with the src directory and the build file)
+        """
+        super().__init__(verbose_obj)
+        self.project_dir = project_dir
+        self.src_dir = os.path.join(project_dir, "src")
+        self.generator = Generator.detect(project_dir)(project_dir)
+
+    @staticmethod
+    def add_subparser(subparsers):
+        """
+        Set up the sync option and all its arguments
+        :param subparsers: subparsers of the argument parser
+        """
+        parser = subparsers.add_parser('sync', help='updates the list of source files used by the build files')
+        parser.add_argument('-v', '--verbose', action='count')
+        # Set a function that will be called to handle the arguments
+        parser.set_defaults(function=Sync.handle_args)
+
+    @staticmethod
+    def handle_args(args, verbose):
+        """
+        Handle the program arguments
+        :param args: Program arguments
+        :param verbose: Verbose object
+        """
+        project_dir = Sync.find_project_dir(os.getcwd())
+        if project_dir is None:
+            Verbose.print_any_level(MessageType.ERROR, "no project found in the current directory or its parents")
+            return
+
+        Sync(verbose, project_dir).sync()
+
+    @staticmethod
+    def find_project_dir(path):
+        """
+        Find the project the path belongs to, i.e. the closest directory (the path itself or one of its parents)
+        which contains the src directory and a build file (e.g. makefile)
+        :param path: path inside the project
+        :return: project directory, or None if the path is not inside a project
+        """
+        path = os.path.abspath(path)
+        while True:
+            if os.path.isdir(os.path.join(path, "src")) and Generator.detect(path) is not None:
+                return path
+
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    @staticmethod
+    def sync_if_in_project(verbose, path):
+        """
+        Update the list of source files, if the path is inside a project
+        :param verbose: Verbose object
+        :param path: path inside the project
+        """
+        project_dir = Sync.find_project_dir(path)
+        if project_dir is not None:
+            Sync(verbose, project_dir).sync()
+
+    def get_sources(self):
+        """
+        Get all source files of the project
+        :return: sorted list of paths of the source files, relative to the project directory
+        """
+        return sorted(os.path.relpath(file, self.project_dir) for file in find_files(self.src_dir, ('.c',)))
+
+    def sync(self):
+        """
+        Update the sources file of the project (e.g. sources.mk) and the compilation database
+        """
+        sources = self.get_sources()
+        if self.generator.sync(sources):
+            self.verbose.print(MessageType.INFO, "Updated {} ({} source files)"
+                               .format(self.generator.SOURCES_FILE, len(sources)))
+        try:
+            self.generator.sync_compile_commands(sources)
+        except BuildFilesError as error:
+            self.verbose.print(MessageType.WARNING, "{} was not updated, {}".format(COMPILE_COMMANDS_FILE, error),
+                               min_level=0)
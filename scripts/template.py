@@ -0,0 +1,103 @@
+import os
+import re
+
+from scripts.config import CPM_DIRECTORY
+from scripts.files import read_template, read_text
+
+# Placeholders in the templates, e.g. [PROJECT_NAME]
+PLACEHOLDER_REGEX = re.compile(r'\[([A-Z][A-Z_]*)\]')
+# Environment variable with the user template directories, separated like PATH
+TEMPLATE_PATH_VARIABLE = "CPM_TEMPLATE_PATH"
+# Directory with the templates of a single project, relative to the project directory
+PROJECT_TEMPLATES_DIR = os.path.join(CPM_DIRECTORY, "templates")
+
+
+class Template:
+    """
+    Template of a created file, split at the placeholders once, so it can be rendered any number of times
+    with a single pass over its parts
+    """
+
+    def __init__(self, text):
+        """
+        :param text: contents of the template
+        """
+        # Text parts at even indexes, placeholder names at odd indexes
+        self.parts = PLACEHOLDER_REGEX.split(text)
+
+    def render(self, values):
+        """
+        Substitute the values for the placeholders. Placeholders without a value are kept as they are.
+        :param values: dict mapping the placeholder names (without the brackets) to their values
+        :return: rendered text
+        """
+        parts = list(self.parts)
+        for i in range(1, len(parts), 2):
+            parts[i] = values.get(parts[i], "[" + parts[i] + "]")
+        return "".join(parts)
+
+
+class Templates:
+    """
+    Templates looked up in the user template directories first, then among the templates of cpm. Every template
+    is read and split only the first time it is used in the process.
+    """
+    # Templates loaded so far, by the directories they were looked up in and the filename
+    _cache = {}
+
+    def __init__(self, directories=()):
+        """
+        :param directories: user template directories, the first one has the highest priority
+        """
+        self.directories = tuple(directories)
+
+    @staticmethod
+    def for_project(project_dir=None):
+        """
+        Get the templates used for a project: the ones in .cpm/templates of the project, then the ones
+        in the directories listed in $CPM_TEMPLATE_PATH, then the templates of cpm
+        :param project_dir: project directory, or None if there is no project (yet)
+        :return: Templates
+        """
+        directories = [os.path.join(project_dir, PROJECT_TEMPLATES_DIR)] if project_dir is not None else []
+        directories.extend(directory for directory in os.environ.get(TEMPLATE_PATH_VARIABLE, "").split(os.pathsep)
+                           if directory)
+        return Templates(directories)
+
+    @staticmethod
+    def clear_cache():
+        """
+        Forget the loaded templates, so the changes of the template files are picked up
+        """
+        Templates._cache.clear()
+
+    def read(self, filename):
+        """
+        Read the template from the first directory that contains it
+        :param filename: name of the template file, e.g. module.c.txt
+        :return: contents of the template as str
+        """
+        for directory in self.directories:
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                return read_text(path)
+        return read_template(filename)
+
+    def get(self, filename):
+        """
+        :param filename: name of the template file, e.g. module.c.txt
+        :return: Template
+        """
+        key = (self.directories, filename)
+        template = Templates._cache.get(key)
+        if template is None:
+            template = Templates._cache[key] = Template(self.read(filename))
+        return template
+
+    def render(self, filename, values):
+        """
+        :param filename: name of the template file, e.g. module.c.txt
+        :param values: dict mapping the placeholder names to their values
+        :return: rendered template
+        """
+        return self.get(filename).render(values)
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from scripts import api
+
+
+class ApiTest(unittest.TestCase):
+    """
+    Provides tests for the api.py script
+    """
+
+    def test_create_modules(self):
+        """
+        Test if the modules are created in the given directory, and the ones that cannot be created are reported
+        """
+        with tempfile.TemporaryDirectory() as root:
+            open(os.path.join(root, "taken.h"), mode='w').close()
+
+            results = api.create_modules(root, ["foo", "taken", "foo", "../x", ""])
+            self.assertEqual(["foo", "taken", "foo", "../x", ""], [result.name for result in results])
+            self.assertEqual([os.path.join(root, "foo.c"), os.path.join(root, "foo.h")], results[0].files)
+            self.assertIsNone(results[0].error)
+            for result in results[1:]:
+                with self.subTest(name=result.name):
+                    self.assertIsNotNone(result.error)
+                    self.assertEqual([], result.files)
+            self.assertEqual(["foo.c", "foo.h", "taken.h"], sorted(os.listdir(root)))
+
+            results = api.create_modules(root, ["bar"], directory=True)
+            self.assertEqual([os.path.join(root, "bar", "bar.c"), os.path.join(root, "bar", "bar.h")],
+                             results[0].files)
+            for file in results[0].files:
+                self.assertTrue(os.path.isfile(file))
+
+    def test_rename_module(self):
+        """
+        Test if the module is renamed and the files including it are updated, without the working directory
+        """
+        with tempfile.TemporaryDirectory() as project_dir:
+            src_dir = os.path.join(project_dir, "src")
+            os.mkdir(src_dir)
+            with open(os.path.join(src_dir, "main.c"), mode='w') as main:
+                main.write('#include "foo/foo.h"\n')
+            api.create_modules(src_dir, ["foo"], directory=True)
+
+            result = api.rename_module(src_dir, "foo", "bar")
+            self.assertIsNone(result.error)
+            self.assertEqual([os.path.join(src_dir, "bar", "bar.c"), os.path.join(src_dir, "bar", "bar.h")],
+                             result.files)
+            self.assertEqual(["main.c"], result.updated_files)
+            with open(os.path.join(src_dir, "main.c"), mode='r') as main:
+                self.assertEqual('#include "bar/bar.h"\n', main.read())
+
+            result = api.rename_module(src_dir, "foo", "baz")
+            self.assertIsNotNone(result.error)
+            self.assertEqual([], result.files)
+
+            result = api.rename_module(src_dir, "bar", "../baz")
+            self.assertIsNotNone(result.error)
+            self.assertTrue(os.path.isdir(os.path.join(src_dir, "bar")))
+
@@ -0,0 +1,113 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from scripts.cache import CompileCommand, ObjectCache, parse_size
+
+
+class CacheTest(unittest.TestCase):
+    """
+    Provides tests for the cache.py script
+    """
+
+    def test_parse_size(self):
+        """
+        Test if sizes with and without suffixes are parsed
+        """
+        for value, expected in (("100", 100), ("2K", 2048), ("3m", 3 * 1024 ** 2), ("1G", 1024 ** 3)):
+            with self.subTest(value=value):
+                self.assertEqual(expected, parse_size(value))
+
+    def test_compile_command(self):
+        """
+        Test if the output, the dependency file and the preprocessing command are found
+        """
+        command = CompileCommand(["gcc", "-c", "src/foo.c", "-g", "-MMD", "-MP", "-o", "build/foo.o"])
+        self.assertTrue(command.cacheable())
+        self.assertEqual("build/foo.o", command.output)
+        self.assertEqual("build/foo.d", command.depfile)
+        self.assertEqual(["gcc", "src/foo.c", "-g", "-E"], command.preprocess_args)
+
+        command = CompileCommand(["gcc", "-c", "foo.c", "-MMD", "-MF", "foo.o.d", "-o", "foo.o"])
+        self.assertEqual("foo.o.d", command.depfile)
+
+        with self.subTest(msg="Linking"):
+            self.assertFalse(CompileCommand(["gcc", "-o", "foo", "foo.o", "bar.o"]).cacheable())
+        with self.subTest(msg="Split debug information"):
+            self.assertFalse(CompileCommand(["gcc", "-c", "foo.c", "-g", "-gsplit-dwarf", "-o", "foo.o"]).cacheable())
+        with self.subTest(msg="Profile data"):
+            for option in ("-fprofile-use", "-fprofile-use=build/pgo-data", "-fprofile-generate"):
+                self.assertFalse(CompileCommand(["gcc", "-c", "foo.c", option, "-o", "foo.o"]).cacheable())
+
+    @unittest.skipIf(shutil.which("gcc") is None, "gcc is not installed")
+    def test_compile(self):
+        """
+        Test if the object is served from the cache the second time it is compiled
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "foo.c")
+            output = os.path.join(directory, "foo.o")
+            with open(source, mode='w') as file:
+                file.write("int foo(void) { return 1; }\n")
+
+            cache = ObjectCache(os.path.join(directory, "cache"), max_size=1024 ** 2)
+            args = ["gcc", "-c", source, "-MMD", "-o", output]
+            self.assertEqual(0, cache.compile(args))
+            with open(output, mode='rb') as file:
+                compiled = file.read()
+            os.remove(output)
+            os.remove(os.path.join(directory, "foo.d"))
+
+            self.assertEqual(0, cache.compile(args))
+            with open(output, mode='rb') as file:
+                self.assertEqual(compiled, file.read())
+            self.assertTrue(os.path.exists(os.path.join(directory, "foo.d")))
+
+            stats = cache.stats()
+            self.assertEqual((1, 1, 1), (stats['objects'], stats['hits'], stats['misses']))
+            self.assertEqual(1, cache.prune(0))
+            self.assertEqual(0, cache.stats()['objects'])
+
+    @unittest.skipIf(shutil.which("gcc") is None, "gcc is not installed")
+    def test_compile_messages(self):
+        """
+        Test if the warnings of the compiler are printed again when the object is served from the cache
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "foo.c")
+            with open(source, mode='w') as file:
+                file.write("int foo(void) { int unused; return 1; }\n")
+
+            cache = ObjectCache(os.path.join(directory, "cache"), max_size=1024 ** 2)
+            args = ["gcc", "-c", source, "-Wall", "-o", os.path.join(directory, "foo.o")]
+            printed = []
+            for _ in range(2):
+                stderr = io.TextIOWrapper(io.BytesIO(), write_through=True)
+                with contextlib.redirect_stderr(stderr):
+                    self.assertEqual(0, cache.compile(args))
+                printed.append(stderr.buffer.getvalue())
+
+            self.assertIn(b"unused", printed[0])
+            self.assertEqual(printed[0], printed[1])
+            self.assertEqual(1, cache.stats()['hits'])
+
+    def test_fetch_evicted(self):
+        """
+        Test if an object evicted by another compilation while it is fetched is a cache miss
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ObjectCache(os.path.join(directory, "cache"), max_size=1024 ** 2)
+            command = CompileCommand(["gcc", "-c", "foo.c", "-MMD", "-o", os.path.join(directory, "foo.o")])
+            key = "0" * 64
+            os.makedirs(os.path.join(cache.directory, key[0]))
+            with open(cache.entry_path(key, '.o'), mode='wb') as file:
+                file.write(b"object")
+
+            # The dependency file is gone, as if the eviction happened after the object was copied
+            self.assertIsNone(cache.fetch(key, command))
+            with open(cache.entry_path(key, '.d'), mode='w') as file:
+                file.write("foo.o: foo.c\n")
+            self.assertEqual(b"", cache.fetch(key, command))
@@ -1,8 +1,11 @@
+import json
 import os
 import shutil
 import unittest
 import linecache
 import tests.loader as loader
+from scripts.generators import GENERATORS
+from scripts.template import Templates
 
 cpm = loader.load("cpm")
 
@@ -73,13 +76,77 @@ class TestMain(unittest.TestCase):
         with self.subTest(msg="Main directory"):
             self.assertTrue(os.path.exists(new_project_name))
         with self.subTest(msg="makefile"):
-            template_line = linecache.getline('../templates/makefile.txt', 27)
-            project_line = linecache.getline(new_project_name + '/makefile', 27)
-            template_line = template_line.replace('[PROJECT_NAME]', new_project_name)
-            self.assertTrue(template_line == project_line)
+            with open(os.path.join(new_project_name, 'makefile'), mode='r') as makefile:
+                text = makefile.read()
+            self.assertIn("-o $(OBJ)/{} ".format(new_project_name), text)
+            self.assertNotIn(project_name, text)
 
         shutil.rmtree(new_project_name)
 
+    def test_rename_project_build_file(self):
+        """
+        Test if only the program name changes in the build files, even if the old name is used by them otherwise
+        """
+        for generator in GENERATORS.values():
+            expected = Templates().render(generator.TEMPLATE, {'PROJECT_NAME': "app",
+                                                               'PROFILE': str(generator.DEFAULT_PROFILE)})
+            for project_name in ("cpm", "debug", "cache"):
+                with self.subTest(generator=generator.NAME, name=project_name):
+                    cpm.main(["project", "--generator", generator.NAME, project_name])
+                    cpm.main(["project", "-r", project_name, "app"])
+
+                    with open(os.path.join("app", generator.BUILD_FILE), mode='r') as build_file:
+                        self.assertEqual(expected, build_file.read())
+                    shutil.rmtree("app")
+
+    def test_rename_project_compile_commands(self):
+        """
+        Test if the compilation database refers to the renamed project directory
+        """
+        project_name = "foo"
+        self.create_project(project_name)
+
+        new_project_name = "bar"
+        cpm.main(["project", "-r", project_name, new_project_name])
+
+        with open(os.path.join(new_project_name, "compile_commands.json"), mode='r') as compile_commands:
+            self.assertEqual([os.path.abspath(new_project_name)],
+                             [command['directory'] for command in json.load(compile_commands)])
+
+        shutil.rmtree(new_project_name)
+
+    def test_create_project_profile(self):
+        """
+        Test if the build profile given to the project becomes the default profile of the makefile
+        """
+        project_name = "foo"
+        cpm.main(["project", "--profile", "release", project_name])
+
+        with open(os.path.join(project_name, 'makefile'), mode='r') as makefile:
+            self.assertIn("PROFILE = release\n", makefile.readlines())
+
+        shutil.rmtree(project_name)
+
+    def test_create_project_spec(self):
+        """
+        Test if the directories and modules of the spec are created in the project and added to the build files
+        """
+        project_name = "foo"
+        spec_path = "foo_spec.json"
+        with open(spec_path, mode='w') as spec_file:
+            spec_file.write('{"modules": ["log"], "directories": [{"name": "net", "modules": '
+                            '[{"name": "conn{}", "count": 3, "includes": ["log"]}]}]}')
+        cpm.main(["project", "--spec", spec_path, project_name])
+
+        for path in ("src/log.c", "src/log.h", "src/net/conn1.c", "src/net/conn3.h"):
+            with self.subTest(path=path):
+                self.assertTrue(os.path.isfile(os.path.join(project_name, path)))
+        with open(os.path.join(project_name, "sources.mk"), mode='r') as sources:
+            self.assertIn("src/net/conn2.c", sources.read())
+
+        os.remove(spec_path)
+        shutil.rmtree(project_name)
+
     def test_create_module_no_dir(self):
         """
         Test if source and header files will be created
@@ -152,3 +219,41 @@ class TestMain(unittest.TestCase):
             self.assertTrue(os.path.exists(header_rel_path))  # Header file
 
         shutil.rmtree(new_name)
+
+    def test_rename_modules_batch(self):
+        """
+        Test if renaming many modules at once works
+        """
+        self.create_module_dir("foo")
+        cpm.main(["module", "baz"])
+
+        args = ["module", "-b", "foo=bar", "baz=qux"]
+        cpm.main(args)
+
+        with self.subTest(msg="Directory"):
+            self.assertTrue(os.path.exists("bar/bar.c"))
+            self.assertFalse(os.path.exists("foo"))
+        with self.subTest(msg="Files"):
+            self.assertTrue(os.path.exists("qux.c"))
+            self.assertTrue(os.path.exists("qux.h"))
+        with self.subTest(msg="Header included"):
+            self.assertEqual('#include "qux.h"', linecache.getline("qux.c", 1).strip("\n"))
+
+        shutil.rmtree("bar")
+        os.remove("qux.c")
+        os.remove("qux.h")
+
+    def test_rename_modules_batch_empty_name(self):
+        """
+        Test if pairs with an empty old or new name are rejected before anything is renamed
+        """
+        cpm.main(["module", "foo"])
+        for pair in ("=bar", "foo=", "="):
+            with self.subTest(pair=pair):
+                cpm.main(["module", "-b", pair])
+                self.assertTrue(os.path.exists("foo.c"))
+                self.assertFalse(os.path.exists("bar.c"))
+                self.assertTrue(os.path.isdir(os.getcwd()))
+
+        os.remove("foo.c")
+        os.remove("foo.h")
@@ -0,0 +1,70 @@
+import unittest
+
+from scripts.deps import IncludeGraph
+
+
+class IncludeGraphTest(unittest.TestCase):
+    """
+    Provides tests for the IncludeGraph class of the deps.py script
+    """
+
+    def setUp(self):
+        includes = {
+            "main.c": ["foo/foo.h", "common.h", "stdio.h"],
+            "foo/foo.c": ["foo.h"],
+            "foo/foo.h": ["../common.h"],
+            "bar/bar.c": ["common.h"],
+            "common.h": ["bar/bar.h"],
+            "bar/bar.h": ["../common.h"],
+        }
+        sizes = {"foo/foo.h": 100, "common.h": 10, "bar/bar.h": 1000}
+        self.graph = IncludeGraph(includes, sizes)
+
+    def test_resolve(self):
+        """
+        Test if the includes are resolved relative to the including file first, then relative to src
+        """
+        self.assertEqual(["foo/foo.h", "common.h"], self.graph.edges["main.c"])
+        self.assertEqual(["foo/foo.h"], self.graph.edges["foo/foo.c"])
+        self.assertEqual(["common.h"], self.graph.edges["foo/foo.h"])
+        self.assertEqual(["common.h"], self.graph.edges["bar/bar.c"])
+
+    def test_header_stats(self):
+        """
+        Test if the units including each header directly and transitively are counted, despite the include cycle
+        """
+        stats = self.graph.header_stats()
+        self.assertEqual({'direct': 2, 'transitive': 3, 'fan_out': 1, 'size': 10}, stats["common.h"])
+        self.assertEqual({'direct': 2, 'transitive': 2, 'fan_out': 1, 'size': 100}, stats["foo/foo.h"])
+        self.assertEqual(0, stats["bar/bar.h"]['direct'])
+        self.assertEqual(3, stats["bar/bar.h"]['transitive'])
+
+    def test_expensive_chains(self):
+        """
+        Test if the heaviest chain starting with every header is found, and the chains are ranked by their size times
+        the units including the first header
+        """
+        chains = self.graph.expensive_chains(10)
+        self.assertEqual([
+            {'files': ["bar/bar.h", "common.h"], 'units': 3, 'cost': 3030},
+            {'files': ["common.h", "bar/bar.h"], 'units': 3, 'cost': 3030},
+            {'files': ["foo/foo.h", "common.h", "bar/bar.h"], 'units': 2, 'cost': 2220},
+        ], chains)
+        self.assertEqual(1, len(self.graph.expensive_chains(1)))
+
+    def test_expensive_chains_shared(self):
+        """
+        Test if a chain is credited with every unit including it, not only the units for which it is the heaviest
+        """
+        includes = {"log.h": [], "big.h": ["log.h"], "big.c": ["big.h"]}
+        sizes = {"log.h": 100, "big.h": 1000}
+        for i in range(5):
+            includes["unit{}.c".format(i)] = ["unit{}.h".format(i)]
+            includes["unit{}.h".format(i)] = ["log.h"]
+            sizes["unit{}.h".format(i)] = 10
+
+        chains = IncludeGraph(includes, sizes).expensive_chains(10)
+        self.assertEqual({'files': ["big.h", "log.h"], 'units': 1, 'cost': 1100}, chains[0])
+        self.assertEqual({'files': ["log.h"], 'units': 6, 'cost': 600}, chains[1])
+        # The chains of the unit headers end with log.h, but are read by fewer units than log.h alone
+        self.assertEqual(7, len(chains))
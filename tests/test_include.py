@@ -0,0 +1,44 @@
+import unittest
+
+from scripts.include import REWRITER_CACHE_SIZE, GuardRewriter, IncludeRewriter, parse_includes
+
+
+class IncludeTest(unittest.TestCase):
+    """
+    Provides tests for the include.py script
+    """
+
+    def test_parse_includes(self):
+        """
+        Test if both forms of the #include directive are found
+        """
+        text = '#include <stdio.h>\n#include "foo/foo.h"\nint include;\n  # include "bar.h"\n'
+        self.assertEqual(["stdio.h", "foo/foo.h", "bar.h"], parse_includes(text))
+
+    def test_rewrite(self):
+        """
+        Test if only the included paths of the renamed modules are replaced
+        """
+        rewriter = IncludeRewriter({"foo": "bar"})
+        text = '#include <stdio.h>\n#include "foo/foo.h"\n/* foo.h */\n#include "foo.h"\n'
+        self.assertEqual(('#include <stdio.h>\n#include "bar/bar.h"\n/* foo.h */\n#include "bar.h"\n', 2),
+                         rewriter.rewrite(text))
+
+    def test_rewrite_many(self):
+        """
+        Test renaming several modules at once, including names that are prefixes of each other
+        """
+        rewriter = IncludeRewriter({"foo": "a", "foobar": "b"})
+        text = '#include "foobar/foobar.h"\n#include "foo.h"\n#include "foo/foobar.h"\n'
+        self.assertEqual(('#include "b/b.h"\n#include "a.h"\n#include "foo/b.h"\n', 3), rewriter.rewrite(text))
+
+    def test_rewriter_cache(self):
+        """
+        Test if the rewriters are reused, and only a bounded number of them is kept
+        """
+        self.assertIs(IncludeRewriter.for_rename("foo", "bar"), IncludeRewriter.for_rename("foo", "bar"))
+        for i in range(REWRITER_CACHE_SIZE * 2):
+            IncludeRewriter.for_rename("foo", "bar{}".format(i))
+            GuardRewriter.for_rename("foo", "bar{}".format(i))
+        self.assertLessEqual(IncludeRewriter.for_renames.cache_info().currsize, REWRITER_CACHE_SIZE)
+        self.assertLessEqual(GuardRewriter.for_rename.cache_info().currsize, REWRITER_CACHE_SIZE)
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from scripts.index import IncludeIndex
+
+
+class IncludeIndexTest(unittest.TestCase):
+    """
+    Provides tests for the index.py script
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.src_dir = os.path.join(self.temp_dir.name, "src")
+        os.makedirs(os.path.join(self.src_dir, "foo"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, relative_path, content):
+        path = os.path.join(self.src_dir, relative_path)
+        with open(path, mode='w') as file:
+            file.write(content)
+        return path
+
+    def test_files_including(self):
+        """
+        Test if only the files including the header are returned
+        """
+        main = self.write("main.c", '#include <stdlib.h>\n#include "foo/foo.h"\n')
+        foo = self.write("foo/foo.c", '#include "foo.h"\n')
+        bar = self.write("bar.c", '#include "barfoo.h"\n')
+
+        index = IncludeIndex(self.src_dir)
+        index.refresh([main, foo, bar])
+
+        self.assertEqual(sorted([main, foo]), index.files_including("foo.h"))
+        self.assertEqual([], index.files_including("baz.h"))
+
+    def test_persistence(self):
+        """
+        Test if a saved index is loaded back and refreshed only where files have changed
+        """
+        main = self.write("main.c", '#include "foo.h"\n')
+
+        index = IncludeIndex(self.src_dir)
+        index.refresh([main])
+        index.save()
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, ".cpm", "include_index.json")))
+
+        loaded = IncludeIndex(self.src_dir)
+        loaded.load()
+        loaded.refresh([main])
+        with self.subTest(msg="Unchanged"):
+            self.assertFalse(loaded.changed)
+            self.assertEqual([main], loaded.files_including("foo.h"))
+
+        self.write("main.c", '#include "bar.h"\n#include "baz.h"\n')
+        loaded.refresh([main])
+        with self.subTest(msg="Changed"):
+            self.assertTrue(loaded.changed)
+            self.assertEqual([], loaded.files_including("foo.h"))
+            self.assertEqual([main], loaded.files_including("bar.h"))
+
+        loaded.refresh([])
+        with self.subTest(msg="Removed"):
+            self.assertEqual([], loaded.files_including("bar.h"))
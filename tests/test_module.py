@@ -1,5 +1,10 @@
+import os
+import tempfile
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 
+from scripts.deps import IncludeGraph
+from scripts.index import IncludeIndex
 from scripts.module import Module
 from scripts.verbose import Verbose
 
@@ -35,6 +40,30 @@ class ModuleTest(unittest.TestCase):
                 'original': '#include "../xyz/foo/foo.h"',
                 'expected': '#include "../xyz/bar/bar.h"',
             },
+            {
+                'original': '#include "lib2/v1.0/foo.h"',
+                'expected': '#include "lib2/v1.0/bar.h"',
+            },
+            {
+                'original': '#include <foo/foo.h>',
+                'expected': '#include <bar/bar.h>',
+            },
+            {
+                'original': '  #  include "foo.h" // comment foo.h',
+                'expected': '  #  include "bar.h" // comment foo.h',
+            },
+            {
+                'original': '#include "foo/baz.h"',
+                'expected': '#include "foo/baz.h"',
+            },
+            {
+                'original': '#include "myfoo.h"',
+                'expected': '#include "myfoo.h"',
+            },
+            {
+                'original': '#include "foo.hpp"',
+                'expected': '#include "foo.hpp"',
+            },
         ]
 
         for test in tests:
@@ -63,8 +92,99 @@ class ModuleTest(unittest.TestCase):
                 'original': '// Lorem ipsum FOO_H dolor sit amet',
                 'expected': '// Lorem ipsum BAR_H dolor sit amet'
             },
+            {
+                'original': '#ifndef MYFOO_H',
+                'expected': '#ifndef MYFOO_H'
+            },
         ]
 
         for test in tests:
             with self.subTest(original=test['original']):
                 self.assertEqual(test['expected'], module.rename_header_constant(test['original'], 'bar'))
+
+    def test_map_files(self):
+        """
+        Test if the results of the per-file work are returned in order, with and without the process pool
+        """
+        files = ["dir/file{}.c".format(i) for i in range(Module.MIN_PARALLEL_FILES * 2)]
+        expected = [os.path.basename(file) for file in files]
+
+        module = Module(Verbose(0), "foo", jobs=2)
+        with self.subTest(msg="Serial"):
+            self.assertEqual(expected, list(module.map_files(None, os.path.basename, files)))
+        with self.subTest(msg="Parallel"):
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                self.assertEqual(expected, list(module.map_files(executor, os.path.basename, files)))
+
+    def test_rename_in_source(self):
+        """
+        Test if only the files with a matching include are rewritten, and the others keep their modification time
+        """
+        module = Module(Verbose(0), "foo")
+        with tempfile.TemporaryDirectory() as directory:
+            files = {
+                'including.c': ('#include "foo.h"\nint foo;\n', '#include "bar.h"\nint foo;\n'),
+                'mentioning.c': ('#include "food.h"\nint foo;\n', None),
+                'unrelated.c': ('#include <stdio.h>\n', None),
+            }
+            for filename, (content, _) in files.items():
+                path = os.path.join(directory, filename)
+                with open(path, mode='w') as file:
+                    file.write(content)
+                # Move the modification time back, so a rewrite would always be noticed
+                os.utime(path, ns=(0, 0))
+
+            for filename, (content, expected) in files.items():
+                path = os.path.join(directory, filename)
+                with self.subTest(file=filename):
+                    self.assertEqual(expected is not None, module.rename_in_source(path, 'bar'))
+                    with open(path, mode='r') as file:
+                        self.assertEqual(expected if expected is not None else content, file.read())
+                    self.assertEqual(expected is not None, os.stat(path).st_mtime_ns != 0)
+            self.assertEqual(sorted(files), sorted(os.listdir(directory)))  # No temporary files left behind
+
+    def test_create_many_files(self):
+        """
+        Test if the files of many modules are created with the same contents as one module at a time, and the names
+        already in use are found
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            names = ["mod{}".format(i) for i in range(20)]
+            self.assertEqual(set(), Module.existing_names(names, directory))
+
+            created = Module.create_many_files(names, True, directory, jobs=4)
+            self.assertEqual([[os.path.join(directory, name, name + extension) for extension in ('.c', '.h')]
+                              for name in names], created)
+            Module(Verbose(0), "single", directory=directory).create_files(False)
+            open(os.path.join(directory, "other.h"), mode='w').close()
+            self.assertEqual({"mod3", "single", "other"},
+                             Module.existing_names(["mod3", "single", "other", "free"], directory))
+
+            for extension in ('.c', '.h'):
+                with open(os.path.join(directory, "single" + extension), mode='r') as file:
+                    expected = file.read().replace("single", "mod3").replace("SINGLE", "MOD3")
+                with self.subTest(extension=extension):
+                    with open(os.path.join(directory, "mod3", "mod3" + extension), mode='r') as file:
+                        self.assertEqual(expected, file.read())
+
+    def test_update_usages_index(self):
+        """
+        Test if renaming keeps the headers in the include index (shared with cpm deps), and updates the headers
+        including the module as well
+        """
+        with tempfile.TemporaryDirectory() as project_dir:
+            src_dir = os.path.join(project_dir, "src")
+            os.mkdir(src_dir)
+            for filename, text in (("main.c", '#include "api.h"\n'), ("api.h", '#include "foo.h"\n')):
+                with open(os.path.join(src_dir, filename), mode='w') as file:
+                    file.write(text)
+            module = Module(Verbose(0), "foo", directory=src_dir)
+            module.create_files(False)
+            IncludeGraph.from_index(src_dir)
+
+            module.rename("bar")
+            index = IncludeIndex(src_dir)
+            index.load()
+            self.assertEqual(["api.h", "bar.c", "bar.h", "main.c"], sorted(index.files))
+            with open(os.path.join(src_dir, "api.h"), mode='r') as file:
+                self.assertEqual('#include "bar.h"\n', file.read())
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from scripts.deps import IncludeGraph
+from scripts.prune import Prune
+from scripts.verbose import Verbose
+
+
+class PruneTest(unittest.TestCase):
+    """
+    Provides tests for the prune.py script
+    """
+
+    def test_find_unused(self):
+        """
+        Test if the modules included only by themselves, or only by other unused modules, are found
+        """
+        graph = IncludeGraph({
+            "main.c": ["used/used.h"],
+            "used/used.c": ["used.h", "helper.h"],
+            "used/used.h": [],
+            "used/helper.h": [],
+            "self/self.c": ["self.h"],
+            "self/self.h": [],
+            "extended/extended.c": ["extended.h"],
+            "extended/extended.h": [],
+            "extended/extra.c": ["extended.h"],
+            "dead.c": ["dead.h", "leaf.h"],
+            "dead.h": [],
+            "leaf.c": ["leaf.h"],
+            "leaf.h": [],
+        })
+        self.assertEqual(["dead.h", "leaf.h", "self/self.h"], Prune.find_unused(graph))
+
+    def test_remove(self):
+        """
+        Test if the module files are removed, along with the module directory once it is empty
+        """
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.makedirs(os.path.join(project_dir, "src", "foo"))
+            for path in ("src/foo/foo.c", "src/foo/foo.h", "src/bar.h"):
+                open(os.path.join(project_dir, path), mode='w').close()
+
+            prune = Prune(Verbose(0), project_dir)
+            self.assertEqual(["foo/foo.c", "foo/foo.h"], prune.remove("foo/foo.h"))
+            self.assertFalse(os.path.exists(os.path.join(project_dir, "src", "foo")))
+            self.assertEqual(["bar.h"], prune.remove("bar.h"))
+
+    def test_prune_module_directory(self):
+        """
+        Test if a module included by another file inside its directory is kept, so the file still compiles
+        """
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.makedirs(os.path.join(project_dir, "src", "foo"))
+            open(os.path.join(project_dir, "makefile"), mode='w').close()
+            for path, text in (("src/main.c", ""), ("src/foo/foo.c", '#include "foo.h"\n'), ("src/foo/foo.h", ""),
+                               ("src/foo/extra.c", '#include "foo.h"\n')):
+                with open(os.path.join(project_dir, path), mode='w') as file:
+                    file.write(text)
+
+            Prune(Verbose(0), project_dir).prune(apply=True)
+            self.assertEqual(["extra.c", "foo.c", "foo.h"], sorted(os.listdir(os.path.join(project_dir, "src", "foo"))))
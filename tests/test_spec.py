@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import unittest
+
+from scripts.spec import ProjectSpec, SpecError
+from scripts.template import Templates
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+class SpecTest(unittest.TestCase):
+    """
+    Provides tests for the spec.py script
+    """
+    SPEC = {
+        'unity': 2,
+        'modules': ['log', {'name': 'config', 'directory': True, 'includes': ['log']}],
+        'directories': [
+            {'name': 'net', 'modules': [{'name': 'conn{}', 'count': 2, 'includes': ['log', 'core/shard2/worker']}]},
+            {'name': 'core', 'directories': [{'name': 'shard{}', 'count': 2, 'modules': ['worker']}]},
+        ],
+    }
+
+    def test_read(self):
+        """
+        Test if the directories and modules are read, with the counts expanded
+        """
+        spec = ProjectSpec(self.SPEC)
+        self.assertEqual({'unity': 2}, spec.settings)
+        self.assertEqual(["config", "net", "core", "core/shard1", "core/shard2"], spec.directories)
+        self.assertEqual({
+            'log': "log.h",
+            'config': "config/config.h",
+            'net/conn1': "net/conn1.h",
+            'net/conn2': "net/conn2.h",
+            'core/shard1/worker': "core/shard1/worker.h",
+            'core/shard2/worker': "core/shard2/worker.h",
+        }, spec.headers)
+
+    def test_invalid(self):
+        """
+        Test if the specs which do not describe a valid project are rejected
+        """
+        specs = [
+            ['log'],
+            {'modules': ['log'], 'module': ['config']},
+            {'modules': ['log', 'log']},
+            {'modules': [{'name': 'log', 'directory': True}], 'directories': ['log']},
+            {'modules': [{'name': 'a', 'includes': ['b']}]},
+            {'modules': [{'name': 'worker', 'count': 2}]},
+            {'modules': ['bad_name']},
+            {'modules': ['main']},
+            {'modules': 'log'},
+        ]
+        for spec in specs:
+            with self.subTest(spec=spec):
+                with self.assertRaises(SpecError):
+                    ProjectSpec(spec)
+
+    def test_files(self):
+        """
+        Test if the sources include the headers of their modules and of the modules given in includes,
+        relative to the source
+        """
+        spec = ProjectSpec(self.SPEC)
+        with tempfile.TemporaryDirectory() as src_dir:
+            spec.create_directories(src_dir)
+            files = dict(spec.files(src_dir, Templates(), ""))
+            self.assertEqual(12, len(files))
+            self.assertEqual('#include "conn1.h"\n\n#include "../log.h"\n#include "../core/shard2/worker.h"\n',
+                             files[os.path.join(src_dir, "net", "conn1.c")])
+            self.assertEqual('#include "config.h"\n\n#include "../log.h"\n',
+                             files[os.path.join(src_dir, "config", "config.c")])
+            for path in files:
+                with self.subTest(path=path):
+                    self.assertTrue(os.path.isdir(os.path.dirname(path)))
+
+    def test_load(self):
+        """
+        Test if the spec is loaded from JSON and YAML files
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "layout.json")
+            with open(path, mode='w') as spec_file:
+                json.dump(self.SPEC, spec_file)
+            self.assertEqual(6, len(ProjectSpec.load(path).modules))
+
+            if yaml is not None:
+                path = os.path.join(directory, "layout.yaml")
+                with open(path, mode='w') as spec_file:
+                    yaml.safe_dump(self.SPEC, spec_file)
+                self.assertEqual(6, len(ProjectSpec.load(path).modules))
+
+            with self.assertRaises(SpecError):
+                ProjectSpec.load(os.path.join(directory, "missing.json"))
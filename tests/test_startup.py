@@ -0,0 +1,83 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import install
+
+CPM = os.path.abspath("../scripts/cpm")
+
+
+class StartupTest(unittest.TestCase):
+    """
+    Keeps the start-up of cpm fast - the build files run it for every compiled file (e.g. cpm cache compile)
+    """
+    # Maximum time (in ms) cpm may take to start on top of the Python interpreter itself. Wall times depend on
+    # the machine and its load, so the start-up is only timed when the budget is given.
+    BUDGET = os.environ.get('CPM_STARTUP_BUDGET')
+    RUNS = 11
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        # Installed scripts have their bytecode cached after the first run, so cache it (outside the package)
+        # even if writing it is disabled in the environment the tests run in
+        self.environment = dict(os.environ, CPM_CACHE_DIR=self.temp_dir.name,
+                                PYTHONPYCACHEPREFIX=os.path.join(self.temp_dir.name, "pycache"))
+        self.environment.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_time(self, args):
+        """
+        :param args: command line
+        :return: median of the wall times of running the command, in ms
+        """
+        times = []
+        for _ in range(self.RUNS):
+            start = time.perf_counter()
+            subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=self.environment,
+                           cwd=self.temp_dir.name)
+            times.append((time.perf_counter() - start) * 1000)
+        return statistics.median(times)
+
+    def imported_modules(self, args):
+        """
+        :param args: cpm arguments
+        :return: set of the cpm modules imported when cpm runs with the arguments
+        """
+        code = ("import atexit, runpy, sys\n"
+                "atexit.register(lambda: print(' '.join(m for m in sys.modules if m.startswith('scripts.'))))\n"
+                "sys.argv = ['cpm'] + sys.argv[1:]\n"
+                "runpy.run_path({!r}, run_name='__main__')\n".format(CPM))
+        result = subprocess.run([sys.executable, "-c", code] + args, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, env=self.environment, universal_newlines=True)
+        return set(result.stdout.splitlines()[-1].split())
+
+    def test_lazy_imports(self):
+        """
+        Test if only the module of the used option is imported
+        """
+        modules = self.imported_modules(["cache", "stats"])
+        self.assertIn("scripts.cache", modules)
+        for module in ("scripts.module", "scripts.project", "scripts.generators"):
+            with self.subTest(module=module):
+                self.assertNotIn(module, modules)
+
+    @unittest.skipUnless(BUDGET, "set CPM_STARTUP_BUDGET (in ms) to time the start-up")
+    def test_startup_time(self):
+        """
+        Test if cpm starts within the budget (CPM_STARTUP_BUDGET, in ms) on top of the interpreter start-up
+        """
+        interpreter = self.run_time([sys.executable, "-c", "pass"])
+        zipapp_path = os.path.join(self.temp_dir.name, "cpm.pyz")
+        install.build_zipapp(zipapp_path)
+        for name, command in (("script", CPM), ("zipapp", zipapp_path)):
+            cpm = self.run_time([sys.executable, command, "cache", "stats"])
+            with self.subTest(cpm=name):
+                self.assertLess(cpm - interpreter, float(self.BUDGET),
+                                "cpm ({}) takes {:.0f} ms to start, the interpreter {:.0f} ms"
+                                .format(name, cpm, interpreter))
@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from scripts.stats import CompileTimes
+
+
+class CompileTimesTest(unittest.TestCase):
+    """
+    Provides tests for the CompileTimes class of the stats.py script
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.compile_times = CompileTimes(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_record(self):
+        """
+        Test if a successful command is recorded under its source file, and becomes a run in the history
+        """
+        # Any command with a single source file is recorded, so the test does not need a compiler
+        self.assertEqual(0, self.compile_times.record([sys.executable, "-c", "pass", "./src/foo.c"]))
+        self.assertEqual(1, self.compile_times.record([sys.executable, "-c", "exit(1)", "src/bar.c"]))
+
+        run = self.compile_times.finish_run()
+        self.assertEqual(["src/foo.c"], list(run['units']))
+        self.assertGreater(run['units']['src/foo.c']['rss'], 0)
+        self.assertEqual([run], self.compile_times.read_history())
+        self.assertFalse(os.path.exists(self.compile_times.records_path))
+
+        with self.subTest(msg="No records"):
+            self.assertIsNone(self.compile_times.finish_run())
+
+    def test_regressions(self):
+        """
+        Test if each unit is compared with the last run it was compiled in, ignoring small differences
+        """
+        history = [
+            {'units': {'a.c': {'time': 1.0}, 'b.c': {'time': 1.0}, 'c.c': {'time': 0.01}}},
+            {'units': {'a.c': {'time': 2.0}}},
+            {'units': {'a.c': {'time': 2.1}, 'b.c': {'time': 3.0}, 'c.c': {'time': 0.03}, 'd.c': {'time': 9.0}}},
+        ]
+        self.assertEqual([("b.c", 1.0, 3.0)], CompileTimes.regressions(history, 10))
+        self.assertEqual([("b.c", 1.0, 3.0), ("a.c", 2.0, 2.1)], CompileTimes.regressions(history, 1))
+
+    def test_slowest(self):
+        """
+        Test if the slowest units are returned first
+        """
+        run = {'units': {'a.c': {'time': 1.0}, 'b.c': {'time': 3.0}, 'c.c': {'time': 2.0}}}
+        self.assertEqual(["b.c", "c.c"], [source for source, _ in CompileTimes.slowest(run, 2)])
@@ -0,0 +1,186 @@
+import json
+import os
+import tempfile
+import unittest
+
+from scripts.config import ProjectConfig
+from scripts.generators import MakeGenerator, NinjaGenerator
+from scripts.sync import Sync
+from scripts.verbose import Verbose
+
+
+class SyncTest(unittest.TestCase):
+    """
+    Provides tests for the sync.py script
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.project_dir = os.path.join(self.temp_dir.name, "foo")
+        os.makedirs(os.path.join(self.project_dir, "src", "bar"))
+        for path in ("makefile", "src/main.c", "src/bar/bar.c", "src/bar/bar.h"):
+            open(os.path.join(self.project_dir, path), mode='w').close()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_find_project_dir(self):
+        """
+        Test if the project is found from its directory and any of its subdirectories, but not from outside
+        """
+        for path in ("", "src", "src/bar"):
+            with self.subTest(path=path):
+                self.assertEqual(self.project_dir, Sync.find_project_dir(os.path.join(self.project_dir, path)))
+        with self.subTest(path="outside"):
+            self.assertIsNone(Sync.find_project_dir(self.temp_dir.name))
+
+    def test_sync(self):
+        """
+        Test if sources.mk lists all source files with a rule for each object
+        """
+        Sync(Verbose(0), self.project_dir).sync()
+        with open(os.path.join(self.project_dir, MakeGenerator.SOURCES_FILE), mode='r') as sources_file:
+            lines = sources_file.read().splitlines()
+
+        self.assertIn("SOURCES = src/bar/bar.c src/main.c", lines)
+        self.assertIn("OBJECTS = $(OBJ)/bar/bar.o $(OBJ)/main.o", lines)
+        self.assertIn("OBJ_DIRS = $(OBJ)/ $(OBJ)/bar/", lines)
+        self.assertIn("$(OBJ)/bar/bar.o: src/bar/bar.c | $(OBJ)/bar/", lines)
+        self.assertIn("$(OBJ)/main.o: src/main.c | $(OBJ)/", lines)
+
+    def test_sync_archives(self):
+        """
+        Test if every module directory has its static archive, and the other objects are linked on their own
+        """
+        Sync(Verbose(0), self.project_dir).sync()
+        with open(os.path.join(self.project_dir, MakeGenerator.SOURCES_FILE), mode='r') as sources_file:
+            lines = sources_file.read().splitlines()
+
+        self.assertIn("ROOT_OBJECTS = $(OBJ)/main.o", lines)
+        self.assertIn("MODULE_ARCHIVES = $(OBJ)/bar/libbar.a", lines)
+        self.assertIn("$(OBJ)/bar/libbar.a: $(OBJ)/bar/bar.o", lines)
+
+    def test_sync_ninja(self):
+        """
+        Test if sources.ninja is generated for a project using ninja
+        """
+        os.rename(os.path.join(self.project_dir, "makefile"), os.path.join(self.project_dir, "build.ninja"))
+        Sync(Verbose(0), self.project_dir).sync()
+        with open(os.path.join(self.project_dir, NinjaGenerator.SOURCES_FILE), mode='r') as sources_file:
+            lines = sources_file.read().splitlines()
+
+        self.assertIn("build $builddir/bar/bar.o: cc src/bar/bar.c", lines)
+        self.assertIn("build $builddir/main.o: cc src/main.c", lines)
+        self.assertIn("build $binary: link $builddir/bar/bar.o $builddir/main.o", lines)
+
+    def test_compile_commands_ninja(self):
+        """
+        Test if the compilation database has an entry for each source, with the flags from the build files
+        """
+        os.remove(os.path.join(self.project_dir, "makefile"))
+        with open(os.path.join(self.project_dir, "build.ninja"), mode='w') as build_file:
+            build_file.write("cc = gcc\ncflags = -g\nbuilddir = out\ninclude sources.ninja\n")
+        config = ProjectConfig(self.project_dir)
+        config['pch'] = "common.h"
+        config.save()
+
+        Sync(Verbose(0), self.project_dir).sync()
+        with open(os.path.join(self.project_dir, "compile_commands.json"), mode='r') as compile_commands_file:
+            entries = json.load(compile_commands_file)
+
+        self.assertEqual(["src/bar/bar.c", "src/main.c"], [entry['file'] for entry in entries])
+        self.assertEqual({'directory': os.path.abspath(self.project_dir), 'file': "src/main.c", 'output': "out/main.o",
+                          'arguments': ["gcc", "-g", "-Isrc", "-Winvalid-pch", "-c", "src/main.c", "-o", "out/main.o"]},
+                         entries[1])
+
+    def test_compile_commands_make(self):
+        """
+        Test if the compiler and flags are taken from the makefile without reading the dependency files, and
+        the compilation database is kept as it is when the makefile has an error
+        """
+        with open(os.path.join(self.project_dir, "makefile"), mode='w') as build_file:
+            build_file.write("CC = clang\nCFLAGS = -O1\nOBJ = out\ninclude sources.mk\n"
+                             "DEPENDENCIES = broken.d\n-include $(DEPENDENCIES)\n")
+        with open(os.path.join(self.project_dir, "broken.d"), mode='w') as dependency_file:
+            dependency_file.write("$(error the dependency files are read)\n")
+        compile_commands_path = os.path.join(self.project_dir, "compile_commands.json")
+
+        Sync(Verbose(0), self.project_dir).sync()
+        with open(compile_commands_path, mode='r') as compile_commands_file:
+            entries = json.load(compile_commands_file)
+        self.assertEqual(["clang", "-O1", "-c", "src/main.c", "-o", "out/main.o"], entries[1]['arguments'])
+
+        with open(os.path.join(self.project_dir, "makefile"), mode='a') as build_file:
+            build_file.write("$(error broken)\n")
+        Sync(Verbose(0), self.project_dir).sync()
+        with open(compile_commands_path, mode='r') as compile_commands_file:
+            self.assertEqual(entries, json.load(compile_commands_file))
+
+    def test_sync_pch(self):
+        """
+        Test if the precompiled header is built before all objects
+        """
+        config = ProjectConfig(self.project_dir)
+        config['pch'] = "common.h"
+        config.save()
+
+        Sync(Verbose(0), self.project_dir).sync()
+        with open(os.path.join(self.project_dir, MakeGenerator.SOURCES_FILE), mode='r') as sources_file:
+            lines = sources_file.read().splitlines()
+
+        self.assertIn("PCH = $(SRC)/common.h", lines)
+        self.assertIn("$(OBJECTS): $(PCH_OUTPUT)", lines)
+
+    def test_unity_batches(self):
+        """
+        Test if the sources are split into contiguous batches of similar size, with no empty batches
+        """
+        sources = ["src/{}.c".format(name) for name in "abcdef"]
+        for source, size in zip(sources, (10, 10, 10, 10, 10, 50)):
+            with open(os.path.join(self.project_dir, source), mode='w') as file:
+                file.write("x" * size)
+
+        generator = MakeGenerator(self.project_dir)
+        for batches, expected in ((1, [sources]),
+                                  (2, [sources[:5], sources[5:]]),
+                                  (3, [sources[:3], sources[3:5], sources[5:]]),
+                                  (10, [[source] for source in sources])):
+            with self.subTest(batches=batches):
+                generator.config['unity'] = batches
+                self.assertEqual(expected, generator.get_unity_batches(sources))
+
+    def test_sync_unity(self):
+        """
+        Test if the unity build sources include the source files and are removed when no longer needed
+        """
+        config = ProjectConfig(self.project_dir)
+        config['unity'] = 2
+        config.save()
+
+        Sync(Verbose(0), self.project_dir).sync()
+        unity_dir = os.path.join(self.project_dir, ".cpm", "unity")
+        with open(os.path.join(unity_dir, "unity_1.c"), mode='r') as unity_file:
+            self.assertIn('#include "../../src/bar/bar.c"', unity_file.read().splitlines())
+        with open(os.path.join(self.project_dir, MakeGenerator.SOURCES_FILE), mode='r') as sources_file:
+            lines = sources_file.read().splitlines()
+        self.assertIn("UNITY_OBJECTS = $(OBJ)/unity/unity_1.o $(OBJ)/unity/unity_2.o", lines)
+        self.assertIn("$(OBJ)/unity/unity_2.o: .cpm/unity/unity_2.c | $(OBJ)/unity/", lines)
+
+        config['unity'] = 1
+        config.save()
+        Sync(Verbose(0), self.project_dir).sync()
+        self.assertEqual(["unity_1.c"], os.listdir(unity_dir))
+
+    def test_sync_unity_pch(self):
+        """
+        Test if the unity build sources include the precompiled header before the source files
+        """
+        config = ProjectConfig(self.project_dir)
+        config['unity'] = 1
+        config['pch'] = "common.h"
+        config.save()
+
+        Sync(Verbose(0), self.project_dir).sync()
+        with open(os.path.join(self.project_dir, ".cpm", "unity", "unity_1.c"), mode='r') as unity_file:
+            lines = unity_file.read().splitlines()
+        self.assertEqual(['#include "common.h"', '#include "../../src/bar/bar.c"'], lines[1:3])
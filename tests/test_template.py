@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from scripts.files import read_template
+from scripts.template import Template, Templates
+
+
+class TemplateTest(unittest.TestCase):
+    """
+    Provides tests for the template.py script
+    """
+
+    def tearDown(self):
+        Templates.clear_cache()
+
+    def test_render(self):
+        """
+        Test if the values are substituted for the placeholders, and anything else is kept as it is
+        """
+        template = Template('[PCH_INCLUDE]#include "[NAME].h"\nint main(int argc, char *argv[]) [UNKNOWN] [lower]\n')
+        self.assertEqual('#include "foo.h"\nint main(int argc, char *argv[]) [UNKNOWN] [lower]\n',
+                         template.render({'NAME': 'foo', 'PCH_INCLUDE': ''}))
+        # The values are not substituted again
+        self.assertEqual('[NAME]#include "x.h"\nint main(int argc, char *argv[]) [UNKNOWN] [lower]\n',
+                         template.render({'NAME': 'x', 'PCH_INCLUDE': '[NAME]'}))
+
+    def test_render_makefile(self):
+        """
+        Test if the makefile template renders the same as with replacing the placeholders line by line
+        """
+        text = read_template("makefile.txt")
+        expected = "".join(line.replace("[PROJECT_NAME]", "foo").replace("[PROFILE]", "debug")
+                           for line in text.splitlines(keepends=True))
+        self.assertEqual(expected, Templates().render("makefile.txt", {'PROJECT_NAME': 'foo', 'PROFILE': 'debug'}))
+
+    def test_user_directories(self):
+        """
+        Test if the templates in the user directories take precedence, and the loaded templates are reused
+        """
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            for directory, text in ((first, "first [NAME]\n"), (second, "second [NAME]\n")):
+                with open(os.path.join(directory, "module.h.txt"), mode='w') as template:
+                    template.write(text)
+            with open(os.path.join(second, "module.c.txt"), mode='w') as template:
+                template.write("second source\n")
+
+            templates = Templates([first, second])
+            self.assertEqual("first foo\n", templates.render("module.h.txt", {'NAME': 'foo'}))
+            self.assertEqual("second source\n", templates.render("module.c.txt", {}))
+            self.assertEqual(read_template("main.c.txt"), templates.render("main.c.txt", {}))
+
+            os.remove(os.path.join(first, "module.h.txt"))
+            self.assertIs(templates.get("module.h.txt"), Templates([first, second]).get("module.h.txt"))
+            Templates.clear_cache()
+            self.assertEqual("second foo\n", templates.render("module.h.txt", {'NAME': 'foo'}))
+
+    def test_for_project(self):
+        """
+        Test if the project templates come before the ones in $CPM_TEMPLATE_PATH
+        """
+        environment = os.environ.get('CPM_TEMPLATE_PATH')
+        os.environ['CPM_TEMPLATE_PATH'] = os.pathsep.join(["a", "", "b"])
+        try:
+            self.assertEqual((os.path.join("project", ".cpm", "templates"), "a", "b"),
+                             Templates.for_project("project").directories)
+            self.assertEqual(("a", "b"), Templates.for_project().directories)
+        finally:
+            if environment is None:
+                del os.environ['CPM_TEMPLATE_PATH']
+            else:
+                os.environ['CPM_TEMPLATE_PATH'] = environment